@@ -12,6 +12,10 @@ def create_app():
     app.config.from_object(Config)
     app.config['CORS_HEADERS'] = 'Content-Type,Authorization'
 
+    # orjson-backed jsonify (falls back to the stdlib encoder when not installed)
+    from app.utils.serializers import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
@@ -47,13 +51,31 @@ def create_app():
         resources={r"/api/*": {"origins": ["http://154.17.17.210", "http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:5173", "http://127.0.0.1:3000"]}},
         supports_credentials=False,
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization", "X-Requested-With"]
+        allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Idempotency-Key"]
     )
 
     # Initialize R2 storage
     from app.utils.r2_storage import r2_storage
     r2_storage.init_app(app)
 
+    # Initialize local storage and image variant workers
+    from app.utils.local_storage import local_storage
+    from app.utils.image_pipeline import image_pipeline
+    local_storage.init_app(app)
+    image_pipeline.init_app(app)
+
+    # Initialize catalog cache
+    from app.utils.catalog_cache import catalog_cache
+    catalog_cache.init_app(app)
+
+    # Initialize Idempotency-Key store
+    from app.utils.idempotency import idempotency
+    idempotency.init_app(app)
+
+    # Initialize order change events
+    from app.utils.order_events import order_events
+    order_events.init_app(app)
+
     # Register blueprints
     from app.routes import auth, products, stores, orders, customers, employees, inventory, upload, stats
     app.register_blueprint(auth.bp)
@@ -19,5 +19,25 @@ class Config:
     R2_ENDPOINT_URL = os.getenv('R2_ENDPOINT_URL')
     R2_BUCKET_NAME = os.getenv('R2_BUCKET_NAME', 'smartshelf-products')
 
+    # File storage backend: 'r2' or 'local' (filesystem, for development and tests)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'r2')
+    LOCAL_STORAGE_DIR = os.getenv('LOCAL_STORAGE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads'))
+    LOCAL_STORAGE_URL = os.getenv('LOCAL_STORAGE_URL', '/api/upload/files')
+
+    # Background image variant workers per process
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+
+    # Catalog snapshot cache (seconds before other workers' writes become visible)
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '30'))
+
+    # Idempotency-Key store: 'database' (shared by workers) or 'memory' (single process)
+    IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'database')
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    # Seconds before a claim whose request never finished (crashed worker) can be retried
+    IDEMPOTENCY_LEASE = int(os.getenv('IDEMPOTENCY_LEASE', '60'))
+
+    # Order change events for SSE: 'memory' (per worker) or 'postgres' (LISTEN/NOTIFY across workers)
+    ORDER_EVENTS_BACKEND = os.getenv('ORDER_EVENTS_BACKEND', 'memory')
+
     # Flask
     DEBUG = os.getenv('FLASK_ENV') == 'development'
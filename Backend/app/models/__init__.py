@@ -8,9 +8,11 @@ from app.models.salesperson import SalesPerson
 from app.models.product import Product
 from app.models.inventory import StoreInventory
 from app.models.order import Orders, OrderItem
+from app.models.idempotency import IdempotencyKey
+from app.models.image_variant import ImageVariant
 
 __all__ = [
     'OnlineAccount', 'Employee', 'Customer', 'Home', 'Business',
     'Address', 'Region', 'Store', 'SalesPerson', 'Product',
-    'StoreInventory', 'Orders', 'OrderItem'
+    'StoreInventory', 'Orders', 'OrderItem', 'IdempotencyKey', 'ImageVariant'
 ]
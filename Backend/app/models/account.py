@@ -1,5 +1,6 @@
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.serializers import compile_serializer
 
 class OnlineAccount(db.Model):
     __tablename__ = "onlineaccount"
@@ -16,8 +17,7 @@ class OnlineAccount(db.Model):
         return check_password_hash(self.passwd, password)
 
     def to_dict(self):
-        return {
-            'online_id': self.online_id,
-            'email': self.email,
-            'name': self.name
-        }
+        return serialize_account(self)
+
+
+serialize_account = compile_serializer(OnlineAccount, exclude=('passwd',))
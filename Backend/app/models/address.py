@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializers import compile_serializer
 
 class Address(db.Model):
     __tablename__ = "address"
@@ -11,11 +12,7 @@ class Address(db.Model):
     address_2 = db.Column(db.String(70))
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'state': self.state,
-            'city': self.city,
-            'zipcode': self.zipcode,
-            'address_1': self.address_1,
-            'address_2': self.address_2
-        }
+        return serialize_address(self)
+
+
+serialize_address = compile_serializer(Address)
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializers import compile_serializer
 
 class Customer(db.Model):
     __tablename__ = "customer"
@@ -8,13 +9,12 @@ class Customer(db.Model):
     kind = db.Column(db.Integer)  # 0=home, 1=biz
     address_id = db.Column(db.Integer, db.ForeignKey('address.id'))
 
+    __table_args__ = (
+        db.Index('idx_customer_online', 'online_id'),
+    )
+
     def to_dict(self):
-        return {
-            'id': self.id,
-            'online_id': self.online_id,
-            'kind': self.kind,
-            'address_id': self.address_id
-        }
+        return serialize_customer(self)
 
 
 class Home(db.Model):
@@ -28,14 +28,7 @@ class Home(db.Model):
     sales_id = db.Column(db.Integer, db.ForeignKey('salesperson.employee_id'))
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'marriage_status': self.marriage_status,
-            'gender': self.gender,
-            'age': self.age,
-            'income': self.income,
-            'sales_id': self.sales_id
-        }
+        return serialize_home(self)
 
 
 class Business(db.Model):
@@ -48,10 +41,9 @@ class Business(db.Model):
     sales_id = db.Column(db.Integer, db.ForeignKey('salesperson.employee_id'))
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'company_name': self.company_name,
-            'category': self.category,
-            'gross_income': self.gross_income,
-            'sales_id': self.sales_id
-        }
+        return serialize_business(self)
+
+
+serialize_customer = compile_serializer(Customer)
+serialize_home = compile_serializer(Home)
+serialize_business = compile_serializer(Business)
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializers import compile_serializer
 
 class Employee(db.Model):
     __tablename__ = "employee"
@@ -9,9 +10,7 @@ class Employee(db.Model):
     salary = db.Column(db.BigInteger)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'online_id': self.online_id,
-            'job_title': self.job_title,
-            'salary': self.salary
-        }
+        return serialize_employee(self)
+
+
+serialize_employee = compile_serializer(Employee)
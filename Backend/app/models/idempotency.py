@@ -0,0 +1,17 @@
+from app import db
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotencykey"
+
+    online_id = db.Column(db.Integer, primary_key=True)
+    idem_key = db.Column(db.String(255), primary_key=True)
+    endpoint = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)  # NULL while the first request is still running
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_idempotencykey_created', 'created_at'),
+    )
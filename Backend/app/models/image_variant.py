@@ -0,0 +1,11 @@
+from app import db
+
+
+class ImageVariant(db.Model):
+    __tablename__ = "imagevariant"
+
+    # Generated variants of an uploaded original, looked up when a product takes that image
+    original_url = db.Column(db.String(255), primary_key=True)
+    thumbnail_url = db.Column(db.String(255), nullable=False)
+    webp_url = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
@@ -1,4 +1,6 @@
 from app import db
+from app.utils.fieldsets import select_fields
+from app.utils.serializers import compile_serializer
 
 class StoreInventory(db.Model):
     __tablename__ = "storeinventory"
@@ -8,12 +10,15 @@ class StoreInventory(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     stock = db.Column(db.Integer, nullable=False)
 
-    __table_args__ = (db.UniqueConstraint('store_id', 'product_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('store_id', 'product_id'),
+        db.Index('idx_storeinventory_product', 'product_id'),
+    )
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'store_id': self.store_id,
-            'product_id': self.product_id,
-            'stock': self.stock
-        }
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return select_fields(self, fields)
+        return serialize_inventory(self)
+
+
+serialize_inventory = compile_serializer(StoreInventory)
@@ -1,14 +1,52 @@
 from app import db
+from app.utils.fieldsets import select_fields
+from app.utils.serializers import EASTERN_TZ, compile_serializer
 from datetime import datetime
-import pytz
-
-# US Eastern timezone
-EASTERN_TZ = pytz.timezone('America/New_York')
 
 def get_eastern_time():
     """Get current time in US Eastern timezone"""
     return datetime.now(EASTERN_TZ)
 
+
+def load_order_lookups(orders, customer_names=True, sales_names=True):
+    """
+    Preload customer names/addresses and sales names for a page of orders
+
+    Uses one query per kind of lookup regardless of the number of orders.
+
+    Returns:
+        Dict of maps for Orders.to_dict(lookups=...): 'customers' maps customer
+        id -> (name, address dict or None), 'sales' maps sales id -> name
+    """
+    from app.models.account import OnlineAccount
+    from app.models.address import Address
+    from app.models.customer import Customer
+    from app.models.employee import Employee
+
+    lookups = {'customers': {}, 'sales': {}}
+
+    customer_ids = {order.customer_id for order in orders if order.customer_id}
+    if customer_names and customer_ids:
+        rows = db.session.query(Customer.id, OnlineAccount.name, Address).outerjoin(
+            OnlineAccount, Customer.online_id == OnlineAccount.online_id
+        ).outerjoin(
+            Address, Customer.address_id == Address.id
+        ).filter(Customer.id.in_(customer_ids)).all()
+        lookups['customers'] = {
+            customer_id: (name, address.to_dict() if address else None)
+            for customer_id, name, address in rows
+        }
+
+    sales_ids = {order.sales_id for order in orders if order.sales_id}
+    if sales_names and sales_ids:
+        rows = db.session.query(Employee.id, OnlineAccount.name).outerjoin(
+            OnlineAccount, Employee.online_id == OnlineAccount.online_id
+        ).filter(Employee.id.in_(sales_ids)).all()
+        lookups['sales'] = dict(rows)
+
+    return lookups
+
+
 class Orders(db.Model):
     __tablename__ = "orders"
 
@@ -32,38 +70,19 @@ class Orders(db.Model):
     store = db.relationship('Store', backref='orders', lazy=True)
     customer = db.relationship('Customer', backref='orders', lazy=True)
 
-    def to_dict(self, include_items=False, include_store=False, include_customer_name=False, include_sales_name=False):
-        # Ensure order_date has timezone info
-        order_date_str = None
-        if self.order_date:
-            # If order_date is naive (no timezone), assume it's Eastern time
-            if self.order_date.tzinfo is None:
-                order_date_et = EASTERN_TZ.localize(self.order_date)
-            else:
-                order_date_et = self.order_date.astimezone(EASTERN_TZ)
-            order_date_str = order_date_et.strftime('%Y-%m-%d %H:%M:%S ET')
-
-        # Ensure pickup_date has timezone info
-        pickup_date_str = None
-        if self.pickup_date:
-            # If pickup_date is naive (no timezone), assume it's Eastern time
-            if self.pickup_date.tzinfo is None:
-                pickup_date_et = EASTERN_TZ.localize(self.pickup_date)
-            else:
-                pickup_date_et = self.pickup_date.astimezone(EASTERN_TZ)
-            pickup_date_str = pickup_date_et.strftime('%Y-%m-%d %H:%M:%S ET')
-
-        data = {
-            'id': self.id,
-            'customer_id': self.customer_id,
-            'store_id': self.store_id,
-            'sales_id': self.sales_id,
-            'order_date': order_date_str,
-            'pickup_date': pickup_date_str,
-            'total_amount': self.total_amount,
-            'payment_status': self.payment_status,
-            'pickup_status': self.pickup_status
-        }
+    # Keyset pagination on (order_date, id), globally and per role scope
+    __table_args__ = (
+        db.Index('idx_orders_date_id', 'order_date', 'id'),
+        db.Index('idx_orders_customer_date_id', 'customer_id', 'order_date', 'id'),
+        db.Index('idx_orders_store_date_id', 'store_id', 'order_date', 'id'),
+        db.Index('idx_orders_sales_date_id', 'sales_id', 'order_date', 'id'),
+    )
+
+    def to_dict(self, include_items=False, include_store=False, include_customer_name=False, include_sales_name=False, fields=None, lookups=None):
+        if fields is not None:
+            data = select_fields(self, fields)
+        else:
+            data = serialize_order(self)
         if include_items:
             data['items'] = [item.to_dict() for item in self.items]
         if include_store and self.store:
@@ -71,7 +90,13 @@ class Orders(db.Model):
                 'id': self.store.id,
                 'name': self.store.name
             }
-        if include_customer_name and self.customer:
+        if include_customer_name and lookups is not None:
+            if self.customer_id in lookups['customers']:
+                name, address = lookups['customers'][self.customer_id]
+                data['customer_name'] = name or 'Unknown'
+                if address:
+                    data['customer_address'] = address
+        elif include_customer_name and self.customer:
             from app.models.account import OnlineAccount
             from app.models.address import Address
             account = OnlineAccount.query.get(self.customer.online_id)
@@ -81,7 +106,9 @@ class Orders(db.Model):
                 address = Address.query.get(self.customer.address_id)
                 if address:
                     data['customer_address'] = address.to_dict()
-        if include_sales_name and self.sales_id:
+        if include_sales_name and self.sales_id and lookups is not None:
+            data['sales_name'] = lookups['sales'].get(self.sales_id) or 'Unknown'
+        elif include_sales_name and self.sales_id:
             from app.models.employee import Employee
             from app.models.account import OnlineAccount
             employee = Employee.query.get(self.sales_id)
@@ -105,12 +132,16 @@ class OrderItem(db.Model):
     # Relationships
     product = db.relationship('Product', backref='order_items', lazy=True)
 
+    # Resolves orders containing matched products in order search
+    __table_args__ = (
+        db.Index('idx_orderitem_product_order', 'product_id', 'order_id'),
+    )
+
     def to_dict(self):
-        return {
-            'id': self.id,
-            'order_id': self.order_id,
-            'product_id': self.product_id,
-            'quantity': self.quantity,
-            'sub_price': self.sub_price,
-            'product': self.product.to_dict() if self.product else None
-        }
+        data = serialize_order_item(self)
+        data['product'] = self.product.to_dict() if self.product else None
+        return data
+
+
+serialize_order = compile_serializer(Orders)
+serialize_order_item = compile_serializer(OrderItem)
@@ -1,4 +1,6 @@
 from app import db
+from app.utils.fieldsets import select_fields
+from app.utils.serializers import compile_serializer
 
 class Product(db.Model):
     __tablename__ = "product"
@@ -9,13 +11,19 @@ class Product(db.Model):
     kind = db.Column(db.String(70))
     description = db.Column(db.Text)
     image_url = db.Column(db.String(255))
+    thumbnail_url = db.Column(db.String(255))
+    webp_url = db.Column(db.String(255))
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'product_name': self.product_name,
-            'price': self.price,
-            'kind': self.kind,
-            'description': self.description,
-            'image_url': self.image_url
-        }
+    __table_args__ = (
+        db.Index('idx_product_name_id', 'product_name', 'id'),
+        db.Index('idx_product_kind', 'kind'),
+        db.Index('idx_product_price', 'price'),
+    )
+
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return select_fields(self, fields)
+        return serialize_product(self)
+
+
+serialize_product = compile_serializer(Product)
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializers import compile_serializer
 
 class Region(db.Model):
     __tablename__ = "region"
@@ -8,8 +9,7 @@ class Region(db.Model):
     region_manager = db.Column(db.Integer)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'region_name': self.region_name,
-            'region_manager': self.region_manager
-        }
+        return serialize_region(self)
+
+
+serialize_region = compile_serializer(Region)
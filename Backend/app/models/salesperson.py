@@ -1,4 +1,5 @@
 from app import db
+from app.utils.serializers import compile_serializer
 
 class SalesPerson(db.Model):
     __tablename__ = "salesperson"
@@ -8,8 +9,7 @@ class SalesPerson(db.Model):
     employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, unique=True)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'store_id': self.store_id,
-            'employee_id': self.employee_id
-        }
+        return serialize_salesperson(self)
+
+
+serialize_salesperson = compile_serializer(SalesPerson)
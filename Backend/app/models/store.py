@@ -1,4 +1,6 @@
 from app import db
+from app.utils.fieldsets import select_fields
+from app.utils.serializers import compile_serializer
 
 class Store(db.Model):
     __tablename__ = "store"
@@ -12,13 +14,14 @@ class Store(db.Model):
     # Relationships
     address = db.relationship('Address', foreign_keys=[address_id], lazy='joined')
 
-    def to_dict(self, include_address=False):
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'region_id': self.region_id,
-            'manager_id': self.manager_id
-        }
+    def to_dict(self, include_address=False, fields=None):
+        if fields is not None:
+            data = select_fields(self, fields)
+        else:
+            data = serialize_store(self)
         if include_address and self.address:
             data['address'] = self.address.to_dict()
         return data
+
+
+serialize_store = compile_serializer(Store, fields=('id', 'name', 'region_id', 'manager_id'))
@@ -6,10 +6,33 @@ from app.models.product import Product
 from app.models.store import Store
 from app.models.employee import Employee
 from app.models.salesperson import SalesPerson
+from app.utils.catalog_cache import catalog_cache
+from app.utils.streaming import wants_stream, iter_batches, stream_json_array
+from app.utils.fieldsets import parse_fields, load_only_fields
 
 bp = Blueprint('inventory', __name__, url_prefix='/api/inventory')
 
 
+def serialize_inventory_rows(rows, fields=None):
+    """Serialize rows of StoreInventory with optional Product and store_name columns"""
+    result = []
+    for row in rows:
+        if isinstance(row, StoreInventory):
+            item, product, store_name = row, None, None
+        else:
+            item = row.StoreInventory
+            product = getattr(row, 'Product', None)
+            store_name = getattr(row, 'store_name', None)
+
+        inventory_data = item.to_dict(fields=fields)
+        if product:
+            inventory_data['product'] = product.to_dict()
+        if store_name:
+            inventory_data['store_name'] = store_name
+        result.append(inventory_data)
+    return result
+
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_inventory():
@@ -26,8 +49,19 @@ def get_inventory():
     store_id = request.args.get('store_id', type=int)
     product_id = request.args.get('product_id', type=int)
 
-    # Build query
-    query = StoreInventory.query
+    try:
+        fields = parse_fields(StoreInventory, extra=['product', 'store_name'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Build query, joining product and store so each row needs no extra lookups
+    query = db.session.query(StoreInventory)
+    if fields is not None:
+        query = query.options(load_only_fields(StoreInventory, fields))
+    if fields is None or 'product' in fields:
+        query = query.outerjoin(Product, Product.id == StoreInventory.product_id).add_entity(Product)
+    if fields is None or 'store_name' in fields:
+        query = query.outerjoin(Store, Store.id == StoreInventory.store_id).add_columns(Store.name.label('store_name'))
 
     # Role-based filtering
     if role == 'manager':
@@ -73,23 +107,12 @@ def get_inventory():
     if product_id:
         query = query.filter(StoreInventory.product_id == product_id)
 
-    inventory_items = query.all()
-
-    # Build response with product and store details
-    result = []
-    for item in inventory_items:
-        product = Product.query.get(item.product_id)
-        store = Store.query.get(item.store_id)
+    query = query.order_by(StoreInventory.id)
 
-        inventory_data = item.to_dict()
-        if product:
-            inventory_data['product'] = product.to_dict()
-        if store:
-            inventory_data['store_name'] = store.name
-
-        result.append(inventory_data)
+    if wants_stream():
+        return stream_json_array(iter_batches(query), lambda rows: serialize_inventory_rows(rows, fields), key='inventory')
 
-    return jsonify({'inventory': result}), 200
+    return jsonify({'inventory': serialize_inventory_rows(query.all(), fields)}), 200
 
 
 @bp.route('', methods=['POST'])
@@ -165,6 +188,7 @@ def create_or_update_inventory():
             db.session.add(inventory)
 
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify({
             'message': 'Inventory updated successfully',
@@ -195,6 +219,7 @@ def delete_inventory(inventory_id):
     try:
         db.session.delete(inventory)
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify({'message': 'Inventory deleted successfully'}), 200
 
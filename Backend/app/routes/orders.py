@@ -1,109 +1,210 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app import db
-from app.models.order import Orders, OrderItem
+from app.models.order import Orders, OrderItem, load_order_lookups
 from app.models.customer import Customer, Home, Business
-from app.models.inventory import StoreInventory
-from app.models.product import Product
-from app.models.store import Store
 from app.models.salesperson import SalesPerson
+from app.utils.catalog_cache import catalog_cache
+from app.utils.stock import InsufficientStock, parse_order_lines, reserve_stock, restore_stock
+from app.utils.pricing import quoted_prices, price_lines
+from sqlalchemy import case, insert, or_, update
+from app.utils.streaming import wants_stream, iter_batches, stream_json_array
+from app.utils.fieldsets import parse_fields, load_only_fields
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit, count_rows
+from app.utils.order_search import order_search_filter
+from app.utils.idempotency import idempotent
+from app.utils.order_events import order_events, publish_order_changes
 import random
+import re
 
 bp = Blueprint('orders', __name__, url_prefix='/api/orders')
 
 
-@bp.route('', methods=['POST'])
-@jwt_required()
-def create_order():
-    """Create a new order"""
-    online_id = int(get_jwt_identity())
-    data = request.get_json()
+def assign_sales_ids(customer, store_ids):
+    """
+    Pick the salesperson for a customer's order at each store
 
-    # Get customer
-    customer = Customer.query.filter_by(online_id=online_id).first()
-    if not customer:
-        return jsonify({'error': 'Customer not found'}), 404
+    The customer's own salesperson is used when they have one; otherwise one
+    is chosen at random from each store's salespeople (one query for all stores).
 
-    # Validate required fields
-    if not data.get('store_id') or not data.get('items'):
-        return jsonify({'error': 'Missing required fields'}), 400
-
-    # Determine sales_id
+    Returns:
+        Tuple of ({store_id: sales_id}, error message)
+    """
     sales_id = None
 
     # Check if customer has their own sales person
     if customer.kind == 0:  # Home customer
-        home = Home.query.get(customer.id)
+        home = db.session.get(Home, customer.id)
         if home and home.sales_id:
             sales_id = home.sales_id
     elif customer.kind == 1:  # Business customer
-        business = Business.query.get(customer.id)
+        business = db.session.get(Business, customer.id)
         if business and business.sales_id:
             sales_id = business.sales_id
 
-    # If customer doesn't have their own sales, assign one randomly from the store
-    if not sales_id:
-        store_id = data['store_id']
-        # Get all salespeople from this store
-        salespeople = SalesPerson.query.filter_by(store_id=store_id).all()
-        if salespeople:
-            # Randomly assign one
-            selected_sales = random.choice(salespeople)
-            sales_id = selected_sales.employee_id
-        else:
+    if sales_id:
+        return {store_id: sales_id for store_id in store_ids}, None
+
+    # If customer doesn't have their own sales, assign one randomly from each store
+    by_store = {}
+    for salesperson in SalesPerson.query.filter(SalesPerson.store_id.in_(store_ids)).all():
+        by_store.setdefault(salesperson.store_id, []).append(salesperson.employee_id)
+
+    for store_id in store_ids:
+        if store_id not in by_store:
             # No salespeople available for this store
-            return jsonify({'error': f'No salespeople available for store {store_id}'}), 400
+            return None, f'No salespeople available for store {store_id}'
 
-    try:
-        # Calculate total
-        total_amount = 0
-        order_items = []
+    return {store_id: random.choice(by_store[store_id]) for store_id in store_ids}, None
+
+
+def validate_card(data):
+    """Validate payment card fields, returning an error message or None"""
+    card_number = data.get('cardNumber', '')
+    cardholder_name = data.get('cardholderName', '')
+    expiry_date = data.get('expiryDate', '')
+    cvv = data.get('cvv', '')
+
+    if not all([card_number, cardholder_name, expiry_date, cvv]):
+        return 'Missing payment information'
+
+    # Basic validation (in a real system, you'd use a payment gateway)
+
+    # Validate card number (13-19 digits)
+    if not re.match(r'^\d{13,19}$', card_number):
+        return 'Invalid card number format'
+
+    # Validate expiry date (MM/YY)
+    if not re.match(r'^\d{2}/\d{2}$', expiry_date):
+        return 'Invalid expiry date format'
+
+    # Validate CVV (3-4 digits)
+    if not re.match(r'^\d{3,4}$', cvv):
+        return 'Invalid CVV format'
+
+    # Validate cardholder name (at least 3 characters)
+    if len(cardholder_name.strip()) < 3:
+        return 'Invalid cardholder name'
+
+    return None
+
+
+def cancel_orders(criteria, from_statuses):
+    """
+    Cancel matching orders and return their stock, set-based
+
+    The status guard in the UPDATE makes this safe against concurrent
+    cancellation: stock is only restored for orders this statement moved to
+    cancelled. The caller commits.
+
+    Args:
+        criteria: Filter clauses on Orders
+        from_statuses: pickup_status values that may be cancelled
+
+    Returns:
+        Sorted list of cancelled order ids
+    """
+    cancelled = [row.id for row in db.session.execute(
+        update(Orders)
+        .where(*criteria, Orders.pickup_status.in_(from_statuses))
+        .values(pickup_status=3)
+        .returning(Orders.id)
+        .execution_options(synchronize_session=False)
+    )]
+    restore_stock(db.session, cancelled)
+    return sorted(cancelled)
+
+
+def insufficient_stock_response(error):
+    """400 response naming the products a reservation was short on"""
+    product_ids = [product_id for _, product_id in error.lines]
+    return jsonify({
+        'error': f'Insufficient stock for product {product_ids[0]}',
+        'product_ids': product_ids
+    }), 400
 
-        for item in data['items']:
-            # Check inventory
-            inventory = StoreInventory.query.filter_by(
-                store_id=data['store_id'],
-                product_id=item['product_id']
-            ).first()
 
-            if not inventory or inventory.stock < item['quantity']:
-                return jsonify({'error': f'Insufficient stock for product {item["product_id"]}'}), 400
+@bp.route('', methods=['POST'])
+@jwt_required()
+@idempotent
+def create_order():
+    """Create a new order"""
+    online_id = int(get_jwt_identity())
+    data = request.get_json()
 
-            sub_price = item['price'] * item['quantity']
-            total_amount += sub_price
+    # Get customer
+    customer = Customer.query.filter_by(online_id=online_id).first()
+    if not customer:
+        return jsonify({'error': 'Customer not found'}), 404
 
-            order_items.append({
-                'product_id': item['product_id'],
-                'quantity': item['quantity'],
-                'sub_price': sub_price
-            })
+    # Validate required fields
+    if not data.get('store_id') or not data.get('items'):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    lines, error = parse_order_lines(data['items'], store_id=data['store_id'])
+    if error:
+        return jsonify({'error': error}), 400
+    quoted, error = quoted_prices(data['items'])
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Determine sales_id
+    sales_ids, error = assign_sales_ids(customer, [data['store_id']])
+    if error:
+        return jsonify({'error': error}), 400
 
-            # Reduce inventory
-            inventory.stock -= item['quantity']
+    try:
+        # Price every line from the product table, never from the client
+        sub_prices, price_changes, missing = price_lines(
+            db.session, lines, quoted
+        )
+        if missing:
+            return jsonify({'error': 'Products not found', 'product_ids': missing}), 404
+        if price_changes and data.get('pin_prices'):
+            return jsonify({
+                'error': 'Prices have changed',
+                'price_changes': price_changes
+            }), 409
+
+        # Reserve stock for every line in one conditional UPDATE
+        try:
+            reserve_stock(db.session, lines)
+        except InsufficientStock as e:
+            db.session.rollback()
+            return insufficient_stock_response(e)
 
         # Create order
         order = Orders(
             customer_id=customer.id,
             store_id=data['store_id'],
-            sales_id=sales_id,
-            total_amount=total_amount,
+            sales_id=sales_ids[data['store_id']],
+            total_amount=sum(sub_prices.values()),
             payment_status=False,
             pickup_status=0
         )
         db.session.add(order)
         db.session.flush()
 
-        # Create order items
-        for item_data in order_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                **item_data
-            )
-            db.session.add(order_item)
+        # Create order items with one bulk insert
+        db.session.execute(insert(OrderItem), [
+            {
+                'order_id': order.id,
+                'product_id': product_id,
+                'quantity': quantity,
+                'sub_price': sub_prices[(store_id, product_id)]
+            }
+            for (store_id, product_id), quantity in lines.items()
+        ])
+
+        # Build the response before committing: once committed, the checkout must not report failure
+        result = order.to_dict(include_items=True)
+        result['price_changes'] = price_changes
+        response = jsonify(result)
 
         db.session.commit()
-
-        return jsonify(order.to_dict(include_items=True)), 201
+        catalog_cache.invalidate()
+        publish_order_changes([order.id], 'created')
+        return response, 201
 
     except Exception as e:
         db.session.rollback()
@@ -111,13 +212,121 @@ def create_order():
         return jsonify({'error': 'Failed to create order'}), 500
 
 
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+@idempotent
+def create_orders_batch():
+    """
+    Check out a multi-store cart in one transaction
+
+    Body: {"items": [{"store_id", "product_id", "quantity", "price"}, ...], "pin_prices": false}.
+    One order is created per store; either all orders are created or none.
+    """
+    from sqlalchemy.orm import selectinload
+
+    online_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+
+    customer = Customer.query.filter_by(online_id=online_id).first()
+    if not customer:
+        return jsonify({'error': 'Customer not found'}), 404
+
+    lines, error = parse_order_lines(data.get('items'))
+    if error:
+        return jsonify({'error': error}), 400
+    quoted, error = quoted_prices(data['items'])
+    if error:
+        return jsonify({'error': error}), 400
+
+    store_ids = sorted({store_id for store_id, _ in lines})
+    sales_ids, error = assign_sales_ids(customer, store_ids)
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        sub_prices, price_changes, missing = price_lines(
+            db.session, lines, quoted
+        )
+        if missing:
+            return jsonify({'error': 'Products not found', 'product_ids': missing}), 404
+        if price_changes and data.get('pin_prices'):
+            return jsonify({
+                'error': 'Prices have changed',
+                'price_changes': price_changes
+            }), 409
+
+        # Reserve stock across all stores in one conditional UPDATE
+        try:
+            reserve_stock(db.session, lines)
+        except InsufficientStock as e:
+            db.session.rollback()
+            return insufficient_stock_response(e)
+
+        totals = {store_id: 0 for store_id in store_ids}
+        for (store_id, _), sub_price in sub_prices.items():
+            totals[store_id] += sub_price
+
+        # Create all orders, then all order items, with one bulk insert each
+        created = db.session.execute(
+            insert(Orders).returning(Orders.id, Orders.store_id, sort_by_parameter_order=True),
+            [
+                {
+                    'customer_id': customer.id,
+                    'store_id': store_id,
+                    'sales_id': sales_ids[store_id],
+                    'total_amount': totals[store_id],
+                    'payment_status': False,
+                    'pickup_status': 0
+                }
+                for store_id in store_ids
+            ]
+        ).all()
+        order_ids = {row.store_id: row.id for row in created}
+
+        db.session.execute(insert(OrderItem), [
+            {
+                'order_id': order_ids[store_id],
+                'product_id': product_id,
+                'quantity': quantity,
+                'sub_price': sub_prices[(store_id, product_id)]
+            }
+            for (store_id, product_id), quantity in lines.items()
+        ])
+
+        # Build the response before committing: once committed, the checkout must not report failure
+        orders = Orders.query.options(selectinload(Orders.items)).filter(
+            Orders.id.in_(order_ids.values())
+        ).order_by(Orders.id).all()
+        response = jsonify({
+            'orders': [order.to_dict(include_items=True) for order in orders],
+            'price_changes': price_changes
+        })
+
+        db.session.commit()
+        catalog_cache.invalidate()
+        publish_order_changes(order_ids.values(), 'created')
+        return response, 201
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Create orders batch error: {e}")
+        return jsonify({'error': 'Failed to create orders'}), 500
+
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_orders():
-    """Get orders (filtered by user role)"""
-    from sqlalchemy.orm import joinedload
-    from sqlalchemy import or_
-    from app.models.account import OnlineAccount
+    """
+    Get orders (filtered by user role), newest first
+
+    Without ?page the list is keyset-paginated on (order_date, id): pass the
+    returned next_cursor as ?cursor= for the following page. ?count=exact|capped|
+    estimate|none controls the total (default capped; exact for ?page requests).
+    ?days=N limits the list to the last N days, which prunes partitioned orders.
+    """
+    from datetime import datetime, timedelta
+    from sqlalchemy.orm import selectinload
+    from sqlalchemy import tuple_
 
     online_id = int(get_jwt_identity())
     claims = get_jwt()
@@ -129,16 +338,23 @@ def get_orders():
     store_id = request.args.get('store_id')
     status = request.args.get('status')
     search = request.args.get('search', '').strip()
+    days = request.args.get('days', type=int)
 
     # Pagination parameters
-    page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 20, type=int)  # Default limit to 20 orders per page
+    page = request.args.get('page', type=int)
+    cursor = request.args.get('cursor')
+    limit = parse_limit(request.args.get('limit', type=int), default=20, maximum=100)  # Default limit to 20 orders per page
+    count_mode = request.args.get('count', 'exact' if page else 'capped')
+    if count_mode not in ['exact', 'capped', 'estimate', 'none']:
+        return jsonify({'error': 'count must be exact, capped, estimate or none'}), 400
+
+    # Sparse fieldset: order columns plus optional items/store/customer_name/sales_name
+    try:
+        fields = parse_fields(Orders, extra=['items', 'store', 'customer_name', 'sales_name'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    # Use eager loading to prevent N+1 queries
-    query = Orders.query.options(
-        joinedload(Orders.items).joinedload(OrderItem.product),
-        joinedload(Orders.store)
-    )
+    query = Orders.query
 
     if role == 'customer':
         customer = Customer.query.filter_by(online_id=online_id).first()
@@ -174,46 +390,147 @@ def get_orders():
         query = query.filter_by(store_id=store_id)
     if status is not None:
         query = query.filter_by(pickup_status=int(status))
+    if days:
+        # Bound cutoff lets Postgres skip partitions outside the window
+        query = query.filter(Orders.order_date >= datetime.now() - timedelta(days=days))
 
     # Apply search filter (search by customer name, email, or product name)
     if search:
-        # Join with Customer and OnlineAccount to search by customer name/email
-        query = query.join(Customer, Orders.customer_id == Customer.id)
-        query = query.join(OnlineAccount, Customer.online_id == OnlineAccount.id)
-
-        # Also join with OrderItem and Product to search by product name
-        query = query.join(OrderItem, Orders.id == OrderItem.order_id)
-        query = query.join(Product, OrderItem.product_id == Product.id)
-
-        # Search across customer name, email, and product name
-        search_pattern = f'%{search}%'
-        query = query.filter(
-            or_(
-                OnlineAccount.name.ilike(search_pattern),
-                OnlineAccount.email.ilike(search_pattern),
-                Product.product_name.ilike(search_pattern)
-            )
-        ).distinct()
+        # Matching customer and product ids are resolved through trigram indexes first
+        query = query.filter(order_search_filter(db.session, search))
+
+    def wanted(name):
+        return fields is None or name in fields
+
+    # Include customer name and sales name for non-customer roles
+    include_items = wanted('items')
+    include_store = wanted('store')
+    include_customer = role in ['sales', 'manager', 'region'] and wanted('customer_name')
+    include_sales = role in ['manager', 'region'] and wanted('sales_name')  # Only managers and region can see sales info
+
+    def loader_options(loader):
+        options = []
+        if include_items:
+            options.append(loader(Orders.items).options(loader(OrderItem.product)))
+        if include_store:
+            options.append(loader(Orders.store))
+        if fields is not None:
+            options.append(load_only_fields(Orders, fields, also=['order_date', 'customer_id', 'store_id', 'sales_id']))
+        return options
+
+    def serialize_orders(orders):
+        # Names and addresses for the whole page come from a fixed number of queries
+        lookups = load_order_lookups(orders, customer_names=include_customer, sales_names=include_sales)
+        return [
+            o.to_dict(include_items=include_items, include_store=include_store, include_customer_name=include_customer,
+                      include_sales_name=include_sales, fields=fields, lookups=lookups)
+            for o in orders
+        ]
+
+    # Streaming export of every matching order; selectinload works per batch with yield_per
+    if wants_stream():
+        query = query.options(*loader_options(selectinload)).order_by(Orders.order_date.desc(), Orders.id.desc())
+        return stream_json_array(iter_batches(query), serialize_orders, key='orders')
 
     # Get total count before pagination
-    total_count = query.count()
+    total_count, total_exact = count_rows(query, count_mode)
 
-    # Calculate offset for pagination
-    offset = (page - 1) * limit
+    # Use eager loading to prevent N+1 queries
+    query = query.options(*loader_options(selectinload))
+    query = query.order_by(Orders.order_date.desc(), Orders.id.desc())
+
+    if page:
+        # Legacy offset pagination
+        orders = query.offset((max(page, 1) - 1) * limit).limit(limit).all()
+        result = {'orders': serialize_orders(orders), 'page': page, 'limit': limit}
+    else:
+        # Keyset pagination: each page is an index range scan on (order_date, id)
+        if cursor:
+            try:
+                last_date, last_id = decode_cursor(cursor, 2)
+                last_date = datetime.fromisoformat(last_date)
+                query = query.filter(tuple_(Orders.order_date, Orders.id) < tuple_(last_date, int(last_id)))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+        # Fetch one extra row to know whether there is a next page
+        orders = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            last = orders[-1]
+            next_cursor = encode_cursor(last.order_date.isoformat(), last.id)
+        result = {'orders': serialize_orders(orders), 'next_cursor': next_cursor, 'limit': limit}
+
+    if total_count is not None:
+        result['total'] = total_count
+        result['total_exact'] = total_exact
+    return jsonify(result), 200
+
+
+@bp.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def order_event_stream():
+    """
+    Server-Sent Events stream of order changes visible to the caller
+
+    Customers see their own orders, sales their own, managers their store's
+    and region managers all. EventSource cannot set headers, so the token may
+    be passed as ?jwt=. Each connection holds a worker thread; run gunicorn
+    with threaded or async workers when many dashboards are open.
+    """
+    import json
+    import queue
+    from flask import Response
+    from app.models.employee import Employee
+    from app.routes.stores import get_manager_store_id
 
-    # Order by date and apply pagination
-    orders = query.order_by(Orders.order_date.desc()).offset(offset).limit(limit).all()
+    online_id = int(get_jwt_identity())
+    role = get_jwt().get('role')
 
-    # Include customer name and sales name for non-customer roles
-    include_customer = role in ['sales', 'manager', 'region']
-    include_sales = role in ['manager', 'region']  # Only managers and region can see sales info
+    # Resolve the caller's scope once, then stream without touching the database
+    if role == 'customer':
+        customer = Customer.query.filter_by(online_id=online_id).first()
+        if not customer:
+            return jsonify({'error': 'Customer not found'}), 404
+        scope = ('customer_id', customer.id)
+    elif role == 'sales':
+        employee = Employee.query.filter_by(online_id=online_id).first()
+        if not employee:
+            return jsonify({'error': 'Unauthorized'}), 403
+        scope = ('sales_id', employee.id)
+    elif role == 'manager':
+        store_id = get_manager_store_id(online_id)
+        if not store_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        scope = ('store_id', store_id)
+    elif role == 'region':
+        scope = None
+    else:
+        return jsonify({'error': 'Unauthorized'}), 403
 
-    return jsonify({
-        'orders': [o.to_dict(include_items=True, include_store=True, include_customer_name=include_customer, include_sales_name=include_sales) for o in orders],
-        'total': total_count,
-        'page': page,
-        'limit': limit
-    }), 200
+    subscriber = order_events.subscribe()
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                if event.get('type') != 'resync' and scope and event.get(scope[0]) != scope[1]:
+                    continue
+                yield f"event: order\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            order_events.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @bp.route('/<int:order_id>', methods=['GET'])
@@ -250,19 +567,14 @@ def cancel_order(order_id):
         return jsonify({'error': 'Cannot cancel this order'}), 400
 
     try:
-        # Restore inventory
-        for item in order.items:
-            inventory = StoreInventory.query.filter_by(
-                store_id=order.store_id,
-                product_id=item.product_id
-            ).first()
-            if inventory:
-                inventory.stock += item.quantity
-
-        # Update order status
-        order.pickup_status = 3  # Cancelled
+        # Update order status and restore inventory
+        if not cancel_orders([Orders.id == order.id], [0, 1]):
+            db.session.rollback()
+            return jsonify({'error': 'Cannot cancel this order'}), 400
 
         db.session.commit()
+        catalog_cache.invalidate()
+        publish_order_changes([order.id], 'cancelled')
 
         return jsonify(order.to_dict()), 200
 
@@ -272,6 +584,67 @@ def cancel_order(order_id):
         return jsonify({'error': 'Failed to cancel order'}), 500
 
 
+@bp.route('/bulk-cancel', methods=['POST'])
+@jwt_required()
+def bulk_cancel_orders():
+    """
+    Cancel many open orders at once and return their stock (manager only)
+
+    Body: {"order_ids": [...]} and/or {"store_id": id} to cancel every open
+    order of a store (e.g. a store closure). Only ordered/pending orders are
+    cancelled; the rest are reported as skipped.
+    """
+    from app.routes.stores import get_manager_store_id
+
+    claims = get_jwt()
+    role = claims.get('role')
+
+    if role not in ['manager', 'region']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json() or {}
+    order_ids = data.get('order_ids')
+    store_id = data.get('store_id')
+
+    if order_ids is None and store_id is None:
+        return jsonify({'error': 'order_ids or store_id is required'}), 400
+    if order_ids is not None and (not isinstance(order_ids, list) or not order_ids or any(
+            isinstance(i, bool) or not isinstance(i, int) for i in order_ids)):
+        return jsonify({'error': 'order_ids must be a non-empty list of integers'}), 400
+    if store_id is not None and (isinstance(store_id, bool) or not isinstance(store_id, int)):
+        return jsonify({'error': 'store_id must be an integer'}), 400
+
+    criteria = []
+    if order_ids is not None:
+        criteria.append(Orders.id.in_(order_ids))
+    if store_id is not None:
+        criteria.append(Orders.store_id == store_id)
+
+    # Store managers can only cancel their own store's orders
+    if role == 'manager':
+        manager_store_id = get_manager_store_id(int(get_jwt_identity()))
+        if not manager_store_id or store_id not in (None, manager_store_id):
+            return jsonify({'error': 'Unauthorized - You can only modify your own store'}), 403
+        criteria.append(Orders.store_id == manager_store_id)
+
+    try:
+        cancelled = cancel_orders(criteria, [0, 1])
+        db.session.commit()
+        if cancelled:
+            catalog_cache.invalidate()
+        publish_order_changes(cancelled, 'cancelled')
+
+        result = {'cancelled': cancelled}
+        if order_ids is not None:
+            result['skipped'] = sorted(set(order_ids) - set(cancelled))
+        return jsonify(result), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk cancel orders error: {e}")
+        return jsonify({'error': 'Failed to cancel orders'}), 500
+
+
 @bp.route('/<int:order_id>/request-modification', methods=['POST'])
 @jwt_required()
 def request_modification(order_id):
@@ -348,21 +721,20 @@ def update_order_status(order_id):
 
     try:
         # If cancelling, restore inventory
-        if new_status == 3 and order.pickup_status != 3:
-            for item in order.items:
-                inventory = StoreInventory.query.filter_by(
-                    store_id=order.store_id,
-                    product_id=item.product_id
-                ).first()
-                if inventory:
-                    inventory.stock += item.quantity
+        restored = False
+        if new_status == 3:
+            restored = bool(cancel_orders([Orders.id == order.id], [0, 1, 2]))
 
         # Update pickup_date when marking as complete (picked up)
         if new_status == 2:
             order.pickup_date = get_eastern_time()
 
-        order.pickup_status = new_status
+        if new_status != 3:
+            order.pickup_status = new_status
         db.session.commit()
+        if restored:
+            catalog_cache.invalidate()
+        publish_order_changes([order.id], 'cancelled' if restored else 'status')
 
         return jsonify(order.to_dict(include_items=True, include_store=True)), 200
 
@@ -396,6 +768,7 @@ def update_payment_status(order_id):
     try:
         order.payment_status = bool(payment_status)
         db.session.commit()
+        publish_order_changes([order.id], 'payment')
 
         return jsonify(order.to_dict(include_items=True, include_store=True)), 200
 
@@ -405,8 +778,122 @@ def update_payment_status(order_id):
         return jsonify({'error': 'Failed to update payment status'}), 500
 
 
+@bp.route('/bulk-status', methods=['PUT'])
+@jwt_required()
+def bulk_update_order_status():
+    """
+    Update payment and/or pickup status of many orders (for sales/manager/region)
+
+    Body: {"order_ids": [...], "payment_status": bool, "pickup_status": 0-3}.
+    Payment is applied first, so orders can be marked paid and complete in
+    one call. Returns an outcome per id instead of serialized orders.
+    """
+    from sqlalchemy.orm import load_only
+    from app.models.order import get_eastern_time
+
+    claims = get_jwt()
+    role = claims.get('role')
+
+    # Only sales, manager, and region can update order status
+    if role not in ['sales', 'manager', 'region']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json() or {}
+    order_ids = data.get('order_ids')
+    if (not isinstance(order_ids, list) or not order_ids
+            or any(isinstance(i, bool) or not isinstance(i, int) for i in order_ids)):
+        return jsonify({'error': 'order_ids must be a non-empty list of integers'}), 400
+    order_ids = sorted(set(order_ids))
+
+    payment_status = data.get('payment_status')
+    new_status = data.get('pickup_status')
+    if payment_status is None and new_status is None:
+        return jsonify({'error': 'payment_status or pickup_status is required'}), 400
+
+    # Valid statuses: 0=ordered, 1=pending, 2=complete, 3=cancelled
+    if new_status is not None and new_status not in [0, 1, 2, 3]:
+        return jsonify({'error': 'Invalid status value'}), 400
+    if new_status == 2 and payment_status is not None and not payment_status:
+        return jsonify({'error': 'Cannot mark unpaid order as complete'}), 400
+
+    # Current state of every order with one query
+    orders = {
+        order.id: order for order in Orders.query.options(
+            load_only(Orders.id, Orders.payment_status, Orders.pickup_status)
+        ).filter(Orders.id.in_(order_ids)).all()
+    }
+    errors = {order_id: 'Order not found' for order_id in order_ids if order_id not in orders}
+    found = [order_id for order_id in order_ids if order_id in orders]
+
+    # Stock of cancelled orders was already returned; reopening would oversell
+    if new_status is not None and new_status != 3:
+        for order_id in found:
+            if orders[order_id].pickup_status == 3:
+                errors[order_id] = 'Cannot reopen a cancelled order'
+
+    try:
+        # Rejected orders are left untouched; events go only to ids whose row changed
+        accepted = [order_id for order_id in found if order_id not in errors]
+        paid = set()
+        changed = set()
+        if payment_status is not None and accepted:
+            paid = {row.id for row in db.session.execute(
+                update(Orders).where(
+                    Orders.id.in_(accepted),
+                    or_(Orders.payment_status.is_(None), Orders.payment_status != bool(payment_status))
+                ).values(payment_status=bool(payment_status)).returning(Orders.id)
+                .execution_options(synchronize_session=False)
+            )}
+
+        restored = False
+        if new_status == 3 and accepted:
+            changed = set(cancel_orders([Orders.id.in_(accepted)], [0, 1, 2]))
+            restored = bool(changed)
+            for order_id in accepted:
+                if order_id not in changed:
+                    errors[order_id] = ('Order already cancelled' if orders[order_id].pickup_status == 3
+                                        else 'Order cannot be cancelled')
+        elif new_status is not None and accepted:
+            values = {'pickup_status': new_status}
+            criteria = [Orders.id.in_(accepted), Orders.pickup_status != 3]
+            if new_status == 2:
+                # Prevent marking as complete (picked up) if not paid
+                criteria.append(Orders.payment_status.is_(True))
+                values['pickup_date'] = get_eastern_time()
+
+            changed = {row.id for row in db.session.execute(
+                update(Orders).where(*criteria).values(values).returning(Orders.id)
+                .execution_options(synchronize_session=False)
+            )}
+            for order_id in accepted:
+                if order_id not in changed:
+                    errors[order_id] = 'Cannot mark unpaid order as complete'
+
+        db.session.commit()
+        if restored:
+            catalog_cache.invalidate()
+        publish_order_changes([i for i in found if i in changed], 'cancelled' if new_status == 3 else 'status')
+        publish_order_changes([i for i in found if i in paid and i not in changed], 'payment')
+
+        results = [
+            {'id': order_id, 'ok': False, 'error': errors[order_id]} if order_id in errors
+            else {'id': order_id, 'ok': True}
+            for order_id in order_ids
+        ]
+        return jsonify({
+            'updated': sum(1 for result in results if result['ok']),
+            'results': results
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk update order status error: {e}")
+        return jsonify({'error': 'Failed to update orders'}), 500
+
+
 @bp.route('/<int:order_id>/process-payment', methods=['POST'])
 @jwt_required()
+@idempotent
 def process_payment(order_id):
     """Process credit card payment for an order"""
     online_id = int(get_jwt_identity())
@@ -426,32 +913,9 @@ def process_payment(order_id):
         return jsonify({'error': 'Order is already paid'}), 400
 
     # Validate payment data
-    card_number = data.get('cardNumber', '')
-    cardholder_name = data.get('cardholderName', '')
-    expiry_date = data.get('expiryDate', '')
-    cvv = data.get('cvv', '')
-
-    if not all([card_number, cardholder_name, expiry_date, cvv]):
-        return jsonify({'error': 'Missing payment information'}), 400
-
-    # Basic validation (in a real system, you'd use a payment gateway)
-    import re
-
-    # Validate card number (13-19 digits)
-    if not re.match(r'^\d{13,19}$', card_number):
-        return jsonify({'error': 'Invalid card number format'}), 400
-
-    # Validate expiry date (MM/YY)
-    if not re.match(r'^\d{2}/\d{2}$', expiry_date):
-        return jsonify({'error': 'Invalid expiry date format'}), 400
-
-    # Validate CVV (3-4 digits)
-    if not re.match(r'^\d{3,4}$', cvv):
-        return jsonify({'error': 'Invalid CVV format'}), 400
-
-    # Validate cardholder name (at least 3 characters)
-    if len(cardholder_name.strip()) < 3:
-        return jsonify({'error': 'Invalid cardholder name'}), 400
+    error = validate_card(data)
+    if error:
+        return jsonify({'error': error}), 400
 
     try:
         # In a real system, you would:
@@ -465,6 +929,7 @@ def process_payment(order_id):
         if order.pickup_status == 0:
             order.pickup_status = 1
         db.session.commit()
+        publish_order_changes([order.id], 'payment')
 
         return jsonify({
             'message': 'Payment processed successfully',
@@ -476,3 +941,79 @@ def process_payment(order_id):
         print(f"Process payment error: {e}")
         return jsonify({'error': 'Failed to process payment'}), 500
 
+
+@bp.route('/batch/process-payment', methods=['POST'])
+@jwt_required()
+@idempotent
+def process_payment_batch():
+    """
+    Pay several of the customer's orders with one card
+
+    Body: {"order_ids": [...], "cardNumber", "cardholderName", "expiryDate", "cvv"}.
+    Already-paid orders are skipped and reported.
+    """
+    from sqlalchemy.orm import load_only
+
+    online_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+
+    order_ids = data.get('order_ids')
+    if (not isinstance(order_ids, list) or not order_ids
+            or any(isinstance(i, bool) or not isinstance(i, int) for i in order_ids)):
+        return jsonify({'error': 'order_ids must be a non-empty list of integers'}), 400
+    order_ids = sorted(set(order_ids))
+
+    customer = Customer.query.filter_by(online_id=online_id).first()
+    if not customer:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    # Validate the card once for all orders
+    error = validate_card(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Check existence and ownership of every order with one query
+    orders = Orders.query.options(
+        load_only(Orders.id, Orders.customer_id, Orders.total_amount, Orders.payment_status)
+    ).filter(Orders.id.in_(order_ids)).all()
+
+    found = {order.id for order in orders}
+    missing = [order_id for order_id in order_ids if order_id not in found]
+    if missing:
+        return jsonify({'error': 'Order not found', 'order_ids': missing}), 404
+    if any(order.customer_id != customer.id for order in orders):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    already_paid = sorted(order.id for order in orders if order.payment_status)
+    to_pay = [order for order in orders if not order.payment_status]
+
+    try:
+        paid_ids = []
+        if to_pay:
+            # The payment_status guard keeps a concurrent payment from being counted twice
+            paid_ids = sorted(row.id for row in db.session.execute(
+                update(Orders)
+                .where(Orders.id.in_([order.id for order in to_pay]), Orders.payment_status.is_(False))
+                .values(
+                    payment_status=True,
+                    # When payment is made, change status from 0 (ordered) to 1 (pending)
+                    pickup_status=case((Orders.pickup_status == 0, 1), else_=Orders.pickup_status)
+                )
+                .returning(Orders.id)
+                .execution_options(synchronize_session=False)
+            ))
+        db.session.commit()
+        publish_order_changes(paid_ids, 'payment')
+
+        totals = {order.id: order.total_amount or 0 for order in to_pay}
+        return jsonify({
+            'message': 'Payment processed successfully',
+            'paid': paid_ids,
+            'already_paid': already_paid + sorted(set(totals) - set(paid_ids)),
+            'total_amount': sum(totals[order_id] for order_id in paid_ids)
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Process batch payment error: {e}")
+        return jsonify({'error': 'Failed to process payment'}), 500
@@ -1,71 +1,329 @@
+import math
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
+from sqlalchemy import tuple_, func, case, cast, literal, select, update, BigInteger, Numeric
 from app import db
 from app.models.product import Product
+from app.models.image_variant import ImageVariant
 from app.models.inventory import StoreInventory
 from app.models.store import Store
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from app.utils.catalog_cache import catalog_cache
+from app.utils.product_search import tokenize, search_postgres, search_memory
+from app.utils.streaming import wants_stream, iter_batches, stream_json_array
+from app.utils.product_import import ImportFormatError, import_products
+from app.utils.fieldsets import parse_fields, load_only_fields
+from app.utils.http_cache import serialize, conditional_response, CATALOG_CACHE_CONTROL, CATEGORIES_CACHE_CONTROL
+from app.utils.image_pipeline import variants_for
+from app.utils.pricing import MAX_PRICE
 
 bp = Blueprint('products', __name__, url_prefix='/api/products')
 
+# Maximum number of ids accepted by /batch
+MAX_BATCH_IDS = 200
+
+# Fields that can be changed through /bulk and their maximum lengths (None = unbounded)
+BULK_UPDATE_FIELDS = {
+    'product_name': 140,
+    'price': None,
+    'kind': 70,
+    'description': None,
+    'image_url': 255,
+}
+
+# Price bands for facet counts: (key, label, min cents inclusive, max cents exclusive)
+PRICE_BANDS = [
+    ('0-50', 'Under $50', 0, 5000),
+    ('50-100', '$50 - $100', 5000, 10000),
+    ('100-500', '$100 - $500', 10000, 50000),
+    ('500-1000', '$500 - $1000', 50000, 100000),
+    ('1000+', '$1000 & above', 100000, None),
+]
+
 
 @bp.route('/categories', methods=['GET'])
 def get_categories():
     """Get all unique product categories"""
-    categories = db.session.query(Product.kind).distinct().filter(Product.kind.isnot(None)).all()
-    category_list = [cat[0] for cat in categories if cat[0]]
-    return jsonify(sorted(category_list)), 200
+    snapshot = catalog_cache.get_snapshot()
+    body, etag = snapshot.memoize(('categories',), lambda: serialize(snapshot.categories))
+    return conditional_response(body, etag, CATEGORIES_CACHE_CONTROL)
 
 
-@bp.route('', methods=['GET'])
-def get_products():
-    """Get all products with optional store filtering"""
-    # Query parameters
-    store_id = request.args.get('store_id')  # Filter by store (only in-stock)
+@bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Catalog cache counters for this worker (manager/region only)"""
+    claims = get_jwt()
+    if claims.get('role') not in ['manager', 'region']:
+        return jsonify({'error': 'Unauthorized'}), 403
 
-    query = Product.query
+    return jsonify(catalog_cache.stats()), 200
 
-    # If store_id is provided, only return products in stock at that store
-    if store_id:
-        inventory_items = StoreInventory.query.filter(
-            StoreInventory.store_id == store_id,
-            StoreInventory.stock > 0
-        ).all()
-        
-        in_stock_product_ids = [item.product_id for item in inventory_items]
-        if in_stock_product_ids:
-            query = query.filter(Product.id.in_(in_stock_product_ids))
-        else:
-            # No products in stock at this store
-            return jsonify([]), 200
 
-    products = query.all()
+def product_filters(kinds=None, min_price=None, max_price=None, store_id=None):
+    """Build SQL filter clauses on Product for a facet filter combination"""
+    clauses = []
+    if kinds:
+        clauses.append(Product.kind.in_(kinds))
+    if min_price is not None:
+        clauses.append(Product.price >= min_price)
+    if max_price is not None:
+        clauses.append(Product.price < max_price)
+    if store_id:
+        clauses.append(
+            db.session.query(StoreInventory.id).filter(
+                StoreInventory.product_id == Product.id,
+                StoreInventory.store_id == store_id,
+                StoreInventory.stock > 0
+            ).exists()
+        )
+    return clauses
+
+
+def get_stores_inventory(product_ids):
+    """
+    Build product_id -> stores inventory list with a single joined query
+
+    Args:
+        product_ids: List of product ids
+
+    Returns:
+        Dict mapping product_id to list of {store_id, store_name, stock}
+    """
+    rows = db.session.query(
+        StoreInventory.product_id,
+        StoreInventory.store_id,
+        Store.name,
+        StoreInventory.stock
+    ).outerjoin(
+        Store, Store.id == StoreInventory.store_id
+    ).filter(
+        StoreInventory.product_id.in_(product_ids)
+    ).order_by(StoreInventory.product_id, StoreInventory.store_id).all()
 
-    # Get all inventory in one query
-    all_inventory = StoreInventory.query.all()
-    
-    # Get all stores in one query
-    all_stores = Store.query.all()
-    stores_dict = {s.id: s.name for s in all_stores}
-    
-    # Build inventory map: product_id -> list of inventories
     inventory_map = {}
-    for inv in all_inventory:
-        if inv.product_id not in inventory_map:
-            inventory_map[inv.product_id] = []
-        inventory_map[inv.product_id].append({
-            'store_id': inv.store_id,
-            'store_name': stores_dict.get(inv.store_id, f'Store {inv.store_id}'),
-            'stock': inv.stock
+    for product_id, store_id, store_name, stock in rows:
+        inventory_map.setdefault(product_id, []).append({
+            'store_id': store_id,
+            'store_name': store_name or f'Store {store_id}',
+            'stock': stock
         })
+    return inventory_map
+
+
+def products_with_inventory(products, fields=None):
+    """Serialize products with their stores inventory (one inventory query)"""
+    with_inventory = fields is None or 'stores_inventory' in fields
+    inventory_map = get_stores_inventory([p.id for p in products]) if products and with_inventory else {}
 
-    # Build result with inventory information
     result = []
     for p in products:
-        product_dict = p.to_dict()
-        product_dict['stores_inventory'] = inventory_map.get(p.id, [])
+        product_dict = p.to_dict(fields=fields)
+        if with_inventory:
+            product_dict['stores_inventory'] = inventory_map.get(p.id, [])
         result.append(product_dict)
+    return result
+
 
-    return jsonify(result), 200
+@bp.route('', methods=['GET'])
+def get_products():
+    """Get products with optional store/kind filtering and keyset pagination"""
+    # Query parameters
+    store_id = request.args.get('store_id', type=int)  # Filter by store (only in-stock)
+    kind = request.args.get('kind')
+    sort = request.args.get('sort', 'id')  # 'id' or 'name'
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+    stream = wants_stream()
+
+    if sort not in ['id', 'name']:
+        return jsonify({'error': 'Invalid sort, expected id or name'}), 400
+
+    try:
+        fields = parse_fields(Product, extra=['stores_inventory'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Without limit/cursor, serve the full list from the shared catalog snapshot
+    if limit is None and cursor is None and not stream:
+        snapshot = catalog_cache.get_snapshot()
+        # Same body whatever order the client listed fields in, so one memo entry per selection
+        if fields is not None:
+            fields = tuple(sorted(fields))
+
+        def build():
+            products = snapshot.products_for(store_id=store_id, kind=kind)
+            if sort == 'name':
+                products = sorted(products, key=lambda p: (p['product_name'], p['id']))
+            if fields is not None:
+                products = [{k: p[k] for k in fields if k in p} for p in products]
+            return serialize(products)
+
+        body, etag = snapshot.memoize(('products', store_id, kind, sort, fields), build)
+        return conditional_response(body, etag, CATALOG_CACHE_CONTROL)
+
+    # If store_id is provided, only return products in stock at that store
+    query = Product.query.filter(*product_filters(kinds=[kind] if kind else None, store_id=store_id))
+
+    if sort == 'name':
+        query = query.order_by(Product.product_name, Product.id)
+    else:
+        query = query.order_by(Product.id)
+
+    # Only SELECT requested columns (plus the name sort key for the cursor)
+    if fields is not None:
+        query = query.options(load_only_fields(Product, fields, also=['product_name'] if sort == 'name' else []))
+
+    # Keyset pagination: continue strictly after the last row of the previous page
+    if cursor:
+        try:
+            if sort == 'name':
+                last_name, last_id = decode_cursor(cursor, 2)
+                query = query.filter(tuple_(Product.product_name, Product.id) > tuple_(last_name, int(last_id)))
+            else:
+                last_id, = decode_cursor(cursor, 1)
+                query = query.filter(Product.id > int(last_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    # Streaming export of every remaining product (limit is ignored)
+    if stream:
+        return stream_json_array(iter_batches(query), lambda batch: products_with_inventory(batch, fields))
+
+    limit = parse_limit(limit)
+
+    # Fetch one extra row to know whether another page exists
+    products = query.limit(limit + 1).all()
+    has_more = len(products) > limit
+    products = products[:limit]
+
+    # Inventory restricted to the products on this page
+    result = products_with_inventory(products, fields)
+
+    next_cursor = None
+    if has_more:
+        last = products[-1]
+        next_cursor = encode_cursor(last.product_name, last.id) if sort == 'name' else encode_cursor(last.id)
+
+    return jsonify({
+        'products': result,
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
+
+
+@bp.route('/facets', methods=['GET'])
+def get_facets():
+    """Get product counts per kind, price band and in-stock store for a filter combination"""
+    kinds = [k for k in request.args.get('kind', '').split(',') if k]
+    min_price = request.args.get('min_price', type=int)
+    max_price = request.args.get('max_price', type=int)
+    store_id = request.args.get('store_id', type=int)
+
+    # Each facet ignores its own filter so the sidebar can show alternative choices
+    kind_rows = db.session.query(Product.kind, func.count(Product.id)).filter(
+        *product_filters(min_price=min_price, max_price=max_price, store_id=store_id)
+    ).group_by(Product.kind).all()
+
+    band = case(
+        *[(Product.price < high, key) for key, _, _, high in PRICE_BANDS if high is not None],
+        else_=PRICE_BANDS[-1][0]
+    )
+    band_rows = db.session.query(band, func.count(Product.id)).filter(
+        *product_filters(kinds=kinds, store_id=store_id)
+    ).group_by(band).all()
+
+    store_rows = db.session.query(
+        StoreInventory.store_id, Store.name, func.count(StoreInventory.product_id)
+    ).join(
+        Product, Product.id == StoreInventory.product_id
+    ).join(
+        Store, Store.id == StoreInventory.store_id
+    ).filter(
+        StoreInventory.stock > 0,
+        *product_filters(kinds=kinds, min_price=min_price, max_price=max_price)
+    ).group_by(StoreInventory.store_id, Store.name).order_by(StoreInventory.store_id).all()
+
+    total = db.session.query(func.count(Product.id)).filter(
+        *product_filters(kinds=kinds, min_price=min_price, max_price=max_price, store_id=store_id)
+    ).scalar()
+
+    band_counts = dict(band_rows)
+
+    return jsonify({
+        'total': total,
+        'kinds': sorted(
+            [{'kind': kind, 'count': count} for kind, count in kind_rows if kind],
+            key=lambda k: k['kind']
+        ),
+        'price_bands': [
+            {'key': key, 'label': label, 'min_price': low, 'max_price': high, 'count': band_counts.get(key, 0)}
+            for key, label, low, high in PRICE_BANDS
+        ],
+        'stores': [
+            {'store_id': sid, 'store_name': name, 'count': count}
+            for sid, name, count in store_rows
+        ]
+    }), 200
+
+
+@bp.route('/search', methods=['GET'])
+def search_products():
+    """Ranked full-text search over product name, kind and description"""
+    q = request.args.get('q', '').strip()
+    store_id = request.args.get('store_id', type=int)  # Only products in stock at this store
+    limit = parse_limit(request.args.get('limit', type=int), default=20, maximum=100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    tokens = tokenize(q)
+    if not tokens:
+        return jsonify({'error': 'Missing search query'}), 400
+
+    if db.engine.dialect.name == 'postgresql':
+        hits, total = search_postgres(db.session, tokens, store_id, limit, offset)
+        products = Product.query.filter(Product.id.in_([pid for pid, _ in hits])).all() if hits else []
+        products_by_id = {p['id']: p for p in products_with_inventory(products)}
+    else:
+        snapshot = catalog_cache.get_snapshot()
+        hits, total = search_memory(snapshot, tokens, store_id, limit, offset)
+        products_by_id = snapshot.product_by_id
+
+    result = []
+    for pid, score in hits:
+        if pid in products_by_id:
+            product_dict = dict(products_by_id[pid])
+            product_dict['score'] = round(score, 4)
+            result.append(product_dict)
+
+    return jsonify({
+        'products': result,
+        'total': total,
+        'limit': limit,
+        'offset': offset
+    }), 200
+
+
+@bp.route('/batch', methods=['GET'])
+def get_products_batch():
+    """Get several products with their stores inventory (cart hydration)"""
+    try:
+        ids = list(dict.fromkeys(int(i) for i in request.args.get('ids', '').split(',') if i.strip()))
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+
+    if not ids:
+        return jsonify({'error': 'Missing ids'}), 400
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({'error': f'At most {MAX_BATCH_IDS} ids per request'}), 400
+
+    products = Product.query.filter(Product.id.in_(ids)).all()
+    products_by_id = {p['id']: p for p in products_with_inventory(products)}
+
+    # Preserve the requested order
+    return jsonify({
+        'products': [products_by_id[pid] for pid in ids if pid in products_by_id],
+        'missing': [pid for pid in ids if pid not in products_by_id]
+    }), 200
 
 
 @bp.route('/<int:product_id>', methods=['GET'])
@@ -114,11 +372,19 @@ def create_product():
             price=data['price'],
             kind=data.get('kind'),
             description=data.get('description'),
-            image_url=data.get('image_url')
+            image_url=data.get('image_url'),
+            thumbnail_url=data.get('thumbnail_url'),
+            webp_url=data.get('webp_url')
         )
+        # Variants generated for the uploaded image before the product existed
+        variants = variants_for(product.image_url)
+        if variants:
+            product.thumbnail_url = data.get('thumbnail_url') or variants['thumbnail_url']
+            product.webp_url = data.get('webp_url') or variants['webp_url']
 
         db.session.add(product)
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify(product.to_dict()), 201
 
@@ -128,6 +394,234 @@ def create_product():
         return jsonify({'error': 'Failed to create product'}), 500
 
 
+@bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_products_file():
+    """Bulk import products from CSV or JSONL (admin/manager only)"""
+    claims = get_jwt()
+    if claims.get('role') not in ['manager', 'region']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    # Accept a multipart upload ('file') or a raw request body
+    if 'file' in request.files:
+        upload = request.files['file']
+        stream = upload.stream
+        name = upload.filename or ''
+        content_type = upload.content_type or ''
+    else:
+        stream = request.stream
+        name = ''
+        content_type = request.content_type or ''
+
+    fmt = request.args.get('format')
+    if not fmt:
+        if name.lower().endswith('.csv') or 'csv' in content_type:
+            fmt = 'csv'
+        elif name.lower().endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+            fmt = 'jsonl'
+    if fmt not in ['csv', 'jsonl']:
+        return jsonify({'error': 'Unsupported format, expected csv or jsonl'}), 400
+
+    strict = request.args.get('strict', '').lower() in ['1', 'true', 'yes']
+
+    try:
+        result = import_products(db.session, stream, fmt, strict=strict)
+        if strict and result['error_count']:
+            db.session.rollback()
+            return jsonify(result), 400
+
+        db.session.commit()
+        if result['imported']:
+            catalog_cache.invalidate()
+
+        return jsonify(result), 200
+
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'File must be UTF-8 encoded'}), 400
+    except ImportFormatError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'line': e.line_num}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Import products error: {e}")
+        return jsonify({'error': 'Failed to import products'}), 500
+
+
+def validate_product_value(field, value):
+    """Validate a literal value for a bulk-updatable product field, returning an error or None"""
+    if field not in BULK_UPDATE_FIELDS:
+        return f'Field {field} cannot be updated'
+    if field == 'price':
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_PRICE:
+            return 'price must be a non-negative integer number of cents'
+        return None
+    if field == 'product_name' and not value:
+        return 'product_name cannot be empty'
+    if value is not None and not isinstance(value, str):
+        return f'{field} must be a string'
+    max_length = BULK_UPDATE_FIELDS[field]
+    if value and max_length and len(value) > max_length:
+        return f'{field} exceeds {max_length} characters'
+    return None
+
+
+def variant_values(image_url):
+    """
+    SQL expressions setting thumbnail_url/webp_url to the stored variants of a new image_url
+
+    Args:
+        image_url: New image URL (a literal)
+
+    Returns:
+        Dict of column -> expression; products already on image_url keep their variants
+    """
+    values = {}
+    for column in ['thumbnail_url', 'webp_url']:
+        stored = select(getattr(ImageVariant, column)).where(ImageVariant.original_url == image_url).scalar_subquery()
+        values[column] = case((Product.image_url == image_url, getattr(Product, column)), else_=stored)
+    return values
+
+
+def price_expression(spec):
+    """
+    Build a SQL expression for a price change
+
+    Args:
+        spec: Integer (set), or {'multiply': factor} / {'add': cents}
+
+    Returns:
+        Tuple of (expression, error)
+    """
+    if isinstance(spec, dict) and len(spec) == 1:
+        op, operand = next(iter(spec.items()))
+        if isinstance(operand, bool) or not isinstance(operand, (int, float)) or not math.isfinite(operand):
+            return None, f'{op} operand must be a number'
+        # Computed as NUMERIC so large factors cannot overflow the BIGINT column mid-update
+        price = cast(Product.price, Numeric)
+        if op == 'multiply' and operand >= 0:
+            expr = func.round(price * cast(literal(operand), Numeric))
+        elif op == 'add' and isinstance(operand, int) and abs(operand) <= MAX_PRICE:
+            expr = price + operand
+        else:
+            return None, 'price expression must be {"multiply": factor >= 0} or {"add": integer cents}'
+        # Keep results within 0..MAX_PRICE
+        return cast(case((expr < 0, 0), (expr > MAX_PRICE, MAX_PRICE), else_=expr), BigInteger), None
+
+    error = validate_product_value('price', spec)
+    return (spec, None) if not error else (None, error)
+
+
+@bp.route('/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_update_products():
+    """
+    Update many products with one set-based UPDATE (admin/manager only)
+
+    Body is either {"updates": {"<id>": {field: value}}} or
+    {"filter": {kind, ids, min_price, max_price, store_id}, "set": {field: value | price expression}}.
+    """
+    claims = get_jwt()
+    if claims.get('role') not in ['manager', 'region']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json() or {}
+
+    if 'updates' in data:
+        updates = data['updates']
+        if not isinstance(updates, dict) or not updates:
+            return jsonify({'error': 'updates must be a non-empty object of id -> fields'}), 400
+
+        # One CASE per field keyed by product id: a single statement for the whole map
+        columns = {}
+        try:
+            for pid, changes in updates.items():
+                pid = int(pid)
+                if not isinstance(changes, dict) or not changes:
+                    return jsonify({'error': f'No fields given for product {pid}'}), 400
+                for field, value in changes.items():
+                    error = validate_product_value(field, value)
+                    if error:
+                        return jsonify({'error': f'Product {pid}: {error}'}), 400
+                    columns.setdefault(field, {})[pid] = value
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Product ids must be integers'}), 400
+
+        ids = [int(pid) for pid in updates]
+        values = {
+            field: case(per_id, value=Product.id, else_=getattr(Product, field))
+            for field, per_id in columns.items()
+        }
+        # A new image brings its generated variants (or clears the old image's)
+        if 'image_url' in columns:
+            per_id = {pid: variant_values(url) for pid, url in columns['image_url'].items()}
+            for column in ['thumbnail_url', 'webp_url']:
+                values[column] = case(
+                    {pid: exprs[column] for pid, exprs in per_id.items()},
+                    value=Product.id, else_=getattr(Product, column)
+                )
+        stmt = update(Product).where(Product.id.in_(ids)).values(values)
+
+    elif 'filter' in data and 'set' in data:
+        criteria = data['filter'] if isinstance(data['filter'], dict) else {}
+        changes = data['set'] if isinstance(data['set'], dict) else {}
+        if not changes:
+            return jsonify({'error': 'set must be a non-empty object'}), 400
+
+        kinds = criteria.get('kind')
+        if isinstance(kinds, str):
+            kinds = [kinds]
+        for key in ['min_price', 'max_price', 'store_id']:
+            value = criteria.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or abs(value) > MAX_PRICE):
+                return jsonify({'error': f'{key} must be an integer'}), 400
+        try:
+            clauses = product_filters(
+                kinds=kinds,
+                min_price=criteria.get('min_price'),
+                max_price=criteria.get('max_price'),
+                store_id=criteria.get('store_id')
+            )
+            if criteria.get('ids'):
+                clauses.append(Product.id.in_([int(i) for i in criteria['ids']]))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'ids must be integers'}), 400
+
+        # Refuse accidental whole-catalog updates
+        if not clauses:
+            return jsonify({'error': 'filter must contain at least one criterion'}), 400
+
+        values = {}
+        for field, value in changes.items():
+            if field == 'price':
+                expr, error = price_expression(value)
+            else:
+                expr, error = value, validate_product_value(field, value)
+            if error:
+                return jsonify({'error': error}), 400
+            values[field] = expr
+        if 'image_url' in values:
+            values.update(variant_values(values['image_url']))
+
+        stmt = update(Product).where(*clauses).values(values)
+
+    else:
+        return jsonify({'error': 'Body must contain updates, or filter and set'}), 400
+
+    try:
+        result = db.session.execute(stmt.execution_options(synchronize_session=False))
+        db.session.commit()
+        if result.rowcount:
+            catalog_cache.invalidate()
+
+        return jsonify({'updated': result.rowcount}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk update products error: {e}")
+        return jsonify({'error': 'Failed to update products'}), 500
+
+
 @bp.route('/<int:product_id>', methods=['PUT'])
 @jwt_required()
 def update_product(product_id):
@@ -152,9 +646,19 @@ def update_product(product_id):
         if 'description' in data:
             product.description = data['description']
         if 'image_url' in data:
+            if data['image_url'] != product.image_url:
+                # Variants of the previous image no longer apply; use the new image's if ready
+                variants = variants_for(data['image_url']) or {}
+                product.thumbnail_url = variants.get('thumbnail_url')
+                product.webp_url = variants.get('webp_url')
             product.image_url = data['image_url']
+        if 'thumbnail_url' in data:
+            product.thumbnail_url = data['thumbnail_url']
+        if 'webp_url' in data:
+            product.webp_url = data['webp_url']
 
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify(product.to_dict()), 200
 
@@ -179,6 +683,7 @@ def delete_product(product_id):
     try:
         db.session.delete(product)
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify({'message': 'Product deleted'}), 200
 
@@ -1,3 +1,4 @@
+from datetime import date, timedelta
 from flask import Blueprint, jsonify, request
 from sqlalchemy import text
 from app import db
@@ -16,8 +17,10 @@ def get_manager_stats():
         except ValueError:
             range_days = 30
 
-        # Common date filter string to reuse
-        date_filter = f"AND o.order_date >= CURRENT_DATE - INTERVAL '{range_days} days'"
+        # Common date filter string to reuse. The cutoff is a bound literal date
+        # (not CURRENT_DATE arithmetic) so partitioned orders are pruned at plan time
+        date_filter = "AND o.order_date >= :since"
+        params = {'since': date.today() - timedelta(days=range_days)}
 
         # --- 1. Sales Trend ---
         trend_sql = text(f"""
@@ -30,7 +33,7 @@ def get_manager_stats():
             GROUP BY DATE(order_date) 
             ORDER BY DATE(order_date) ASC
         """)
-        trend_result = db.session.execute(trend_sql).fetchall()
+        trend_result = db.session.execute(trend_sql, params).fetchall()
 
         trend_data = {
             "dates": [str(row.date) for row in trend_result],
@@ -51,7 +54,7 @@ def get_manager_stats():
             ORDER BY revenue DESC
             LIMIT 5
         """)
-        prod_result = db.session.execute(top_products_sql).fetchall()
+        prod_result = db.session.execute(top_products_sql, params).fetchall()
 
         top_products_data = {
             "names": [row.product_name for row in prod_result],
@@ -72,7 +75,7 @@ def get_manager_stats():
             {date_filter}
             GROUP BY c.kind
         """)
-        seg_result = db.session.execute(customer_seg_sql).fetchall()
+        seg_result = db.session.execute(customer_seg_sql, params).fetchall()
 
         segment_data = [
             {"name": row.segment, "value": row.total} for row in seg_result
@@ -90,7 +93,7 @@ def get_manager_stats():
             {date_filter}
             GROUP BY p.kind
         """)
-        cat_result = db.session.execute(category_sql).fetchall()
+        cat_result = db.session.execute(category_sql, params).fetchall()
 
         category_data = [
             {"name": row.kind if row.kind else "Uncategorized", "value": row.revenue}
@@ -116,7 +119,7 @@ def get_manager_stats():
             GROUP BY age_range
             ORDER BY age_range
         """)
-        age_result = db.session.execute(age_sql).fetchall()
+        age_result = db.session.execute(age_sql, params).fetchall()
         age_data = [{"name": row.age_range, "value": row.total} for row in age_result]
 
         # --- 6. Business Categories ---
@@ -131,7 +134,7 @@ def get_manager_stats():
             {date_filter}
             GROUP BY b.category
         """)
-        biz_result = db.session.execute(biz_sql).fetchall()
+        biz_result = db.session.execute(biz_sql, params).fetchall()
 
         biz_data = [
             {"name": row.category if row.category else "Other", "value": row.total}
@@ -151,7 +154,7 @@ def get_manager_stats():
             GROUP BY r.region_name
             ORDER BY total DESC
         """)
-        region_result = db.session.execute(region_sql).fetchall()
+        region_result = db.session.execute(region_sql, params).fetchall()
 
         region_data = {
             "names": [row.region_name for row in region_result],
@@ -177,7 +180,7 @@ def get_manager_stats():
             {date_filter}
             GROUP BY customer_type
         """)
-        whale_data = result_to_dict(db.session.execute(whale_sql).fetchall())
+        whale_data = result_to_dict(db.session.execute(whale_sql, params).fetchall())
 
         # --- 9. Regional Power Rankings ---
         region_rank_sql = text(f"""
@@ -197,12 +200,12 @@ def get_manager_stats():
             GROUP BY r.id, r.region_name, oa.name
             ORDER BY total_revenue DESC
         """)
-        region_rank_data = result_to_dict(db.session.execute(region_rank_sql).fetchall())
+        region_rank_data = result_to_dict(db.session.execute(region_rank_sql, params).fetchall())
 
         # --- 10. The "Dead Stock" Report ---
         # Important: We filter the JOIN, so we only count sales IN THIS PERIOD.
         # If sales in period < 5, it is "dead stock" for this timeframe.
-        dead_stock_sql = text(f"""
+        dead_stock_sql = text("""
             SELECT 
                 p.product_name,
                 s.name as store_name,
@@ -214,14 +217,14 @@ def get_manager_stats():
             JOIN store s ON si.store_id = s.id
             LEFT JOIN orders o ON o.store_id = si.store_id 
                 AND o.payment_status = true 
-                AND o.order_date >= CURRENT_DATE - INTERVAL '{range_days} days'
+                AND o.order_date >= :since
             LEFT JOIN orderitem oi ON p.id = oi.product_id AND oi.order_id = o.id
             GROUP BY p.id, p.product_name, s.name, si.stock
             HAVING si.stock > 20 AND COALESCE(SUM(oi.quantity), 0) < 5
             ORDER BY si.stock DESC
             LIMIT 10
         """)
-        dead_stock_data = result_to_dict(db.session.execute(dead_stock_sql).fetchall())
+        dead_stock_data = result_to_dict(db.session.execute(dead_stock_sql, params).fetchall())
 
         # --- 11. Sales Team Efficiency ---
         efficiency_sql = text(f"""
@@ -245,7 +248,7 @@ def get_manager_stats():
             ORDER BY revenue_generated DESC
             LIMIT 10
         """)
-        efficiency_data = result_to_dict(db.session.execute(efficiency_sql).fetchall())
+        efficiency_data = result_to_dict(db.session.execute(efficiency_sql, params).fetchall())
 
         return jsonify({
             "trend": trend_data,
@@ -1,11 +1,17 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app import db
-from app.models.store import Store
+from app.models.store import Store, serialize_store
 from app.models.inventory import StoreInventory
 from app.models.product import Product
 from app.models.employee import Employee
 from app.models.salesperson import SalesPerson
+from app.utils.catalog_cache import catalog_cache
+from app.utils.stock import parse_stock_items, upsert_stock
+from app.utils.streaming import wants_stream, iter_batches, stream_json_array
+from app.utils.fieldsets import parse_fields
+from app.utils.serializers import serializer_for
+from app.utils.http_cache import serialize, version_etag, conditional_response, CATALOG_CACHE_CONTROL, PRIVATE_CACHE_CONTROL
 
 bp = Blueprint('stores', __name__, url_prefix='/api/stores')
 
@@ -33,16 +39,39 @@ def get_manager_store_id(online_id):
 @jwt_required(optional=True)
 def get_stores():
     """Get all stores (role-based filtering)."""
+    from app.models.account import OnlineAccount
+    from app.models.address import Address
     from app.models.region import Region
 
     region_id = request.args.get('region_id')
 
+    try:
+        fields = parse_fields(Store, extra=['address', 'manager_name', 'region_name'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     # Check if user is authenticated
     current_user_id = get_jwt_identity()
     claims = get_jwt() if current_user_id else {}
     role = claims.get('role') if claims else None
 
-    query = Store.query
+    # Stores with their address, manager name and region name in one query
+    store_columns = [column.key for column in Store.__table__.columns]
+    address_columns = [column.key for column in Address.__table__.columns]
+    query = db.session.query(
+        *[getattr(Store, name) for name in store_columns],
+        *[getattr(Address, name).label(f'addr_{name}') for name in address_columns],
+        OnlineAccount.name.label('manager_name'),
+        Region.region_name
+    ).outerjoin(
+        Address, Store.address_id == Address.id
+    ).outerjoin(
+        Employee, Store.manager_id == Employee.id
+    ).outerjoin(
+        OnlineAccount, Employee.online_id == OnlineAccount.online_id
+    ).outerjoin(
+        Region, Store.region_id == Region.id
+    ).order_by(Store.id)
 
     # Role-based filtering
     if role == 'region' and current_user_id:
@@ -52,36 +81,38 @@ def get_stores():
         if employee:
             region = Region.query.filter_by(region_manager=employee.id).first()
             if region:
-                query = query.filter_by(region_id=region.id)
+                query = query.filter(Store.region_id == region.id)
     elif region_id:
         # Filter by specific region if provided
-        query = query.filter_by(region_id=region_id)
+        query = query.filter(Store.region_id == region_id)
 
-    stores = query.all()
+    rows = query.all()
 
-    # Include manager and region info
-    result = []
-    for store in stores:
-        store_dict = store.to_dict(include_address=True)
-
-        # Add manager name
-        if store.manager_id:
-            manager_emp = Employee.query.get(store.manager_id)
-            if manager_emp:
-                from app.models.account import OnlineAccount
-                manager_account = OnlineAccount.query.get(manager_emp.online_id)
-                if manager_account:
-                    store_dict['manager_name'] = manager_account.name
-
-        # Add region name
-        if store.region_id:
-            region = Region.query.get(store.region_id)
-            if region:
-                store_dict['region_name'] = region.region_name
+    # The ETag depends only on the rows and the requested fields, so it is the same in
+    # every worker; repeat loads get a bare 304 without building the body
+    field_key = tuple(sorted(fields)) if fields is not None else None
+    etag = version_etag('stores', field_key, tuple(tuple(row) for row in rows))
+    if request.if_none_match.contains(etag):
+        return conditional_response(b'', etag, PRIVATE_CACHE_CONTROL)
+
+    def wanted(name):
+        return fields is None or name in fields
 
+    # Rows carry the store columns as attributes, so the compiled serializers apply
+    store_to_dict = serialize_store if fields is None else serializer_for(Store, tuple(fields))
+    result = []
+    for row in rows:
+        store_dict = store_to_dict(row)
+        if wanted('address') and row.addr_id is not None:
+            store_dict['address'] = {name: getattr(row, f'addr_{name}') for name in address_columns}
+        if wanted('manager_name') and row.manager_id and row.manager_name is not None:
+            store_dict['manager_name'] = row.manager_name
+        if wanted('region_name') and row.region_id and row.region_name is not None:
+            store_dict['region_name'] = row.region_name
         result.append(store_dict)
 
-    return jsonify(result), 200
+    body, _ = serialize(result)
+    return conditional_response(body, etag, PRIVATE_CACHE_CONTROL)
 
 
 @bp.route('/<int:store_id>', methods=['GET'])
@@ -98,22 +129,41 @@ def get_store(store_id):
 @bp.route('/<int:store_id>/inventory', methods=['GET'])
 def get_store_inventory(store_id):
     """Get all inventory for a specific store."""
-    store = Store.query.get(store_id)
+    if wants_stream():
+        if not Store.query.get(store_id):
+            return jsonify({'error': 'Store not found'}), 404
 
-    if not store:
-        return jsonify({'error': 'Store not found'}), 404
+        query = db.session.query(StoreInventory, Product).join(
+            Product, Product.id == StoreInventory.product_id
+        ).filter(StoreInventory.store_id == store_id).order_by(StoreInventory.id)
 
-    inventory_items = StoreInventory.query.filter_by(store_id=store_id).all()
+        def serialize_batch(rows):
+            result = []
+            for item, product in rows:
+                inventory_data = item.to_dict()
+                inventory_data['product'] = product.to_dict()
+                result.append(inventory_data)
+            return result
 
-    result = []
-    for item in inventory_items:
-        product = Product.query.get(item.product_id)
-        if product:
-            inventory_data = item.to_dict()
-            inventory_data['product'] = product.to_dict()
-            result.append(inventory_data)
+        return stream_json_array(iter_batches(query), serialize_batch)
 
-    return jsonify(result), 200
+    snapshot = catalog_cache.get_snapshot()
+
+    if store_id not in snapshot.store_names:
+        return jsonify({'error': 'Store not found'}), 404
+
+    def build():
+        result = []
+        for row in snapshot.store_rows.get(store_id, []):
+            product = snapshot.product_by_id.get(row['product_id'])
+            if product:
+                inventory_data = dict(row)
+                inventory_data['product'] = {k: v for k, v in product.items() if k != 'stores_inventory'}
+                result.append(inventory_data)
+        return serialize(result)
+
+    body, etag = snapshot.memoize(('store_inventory', store_id), build)
+    return conditional_response(body, etag, CATALOG_CACHE_CONTROL)
 
 
 @bp.route('/<int:store_id>/inventory/<int:product_id>', methods=['GET'])
@@ -173,6 +223,7 @@ def add_or_update_inventory(store_id):
             db.session.add(inventory)
 
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify(inventory.to_dict()), 200
 
@@ -182,6 +233,56 @@ def add_or_update_inventory(store_id):
         return jsonify({'error': 'Failed to update inventory'}), 500
 
 
+@bp.route('/<int:store_id>/inventory/bulk', methods=['POST'])
+@jwt_required()
+def bulk_upsert_inventory(store_id):
+    """
+    Set or adjust stock for many products of a store in one transaction (manager only)
+
+    Body: {"items": [{"product_id": 1, "stock": 20}, {"product_id": 2, "delta": -3}, ...]}
+    """
+    claims = get_jwt()
+    role = claims.get('role')
+
+    if role not in ['manager', 'region']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    # Store managers can only modify their own store's inventory
+    if role == 'manager':
+        online_id = int(get_jwt_identity())
+        manager_store_id = get_manager_store_id(online_id)
+
+        if not manager_store_id or manager_store_id != store_id:
+            return jsonify({'error': 'Unauthorized - You can only modify your own store'}), 403
+
+    data = request.get_json() or {}
+    levels, deltas, error = parse_stock_items(data.get('items'))
+    if error:
+        return jsonify({'error': error}), 400
+
+    if not db.session.get(Store, store_id):
+        return jsonify({'error': 'Store not found'}), 404
+
+    # Validate every product id with a single IN query
+    product_ids = set(levels) | set(deltas)
+    found = {pid for (pid,) in db.session.query(Product.id).filter(Product.id.in_(product_ids))}
+    missing = sorted(product_ids - found)
+    if missing:
+        return jsonify({'error': 'Products not found', 'product_ids': missing}), 404
+
+    try:
+        inventory = upsert_stock(db.session, store_id, levels, deltas)
+        db.session.commit()
+        catalog_cache.invalidate()
+
+        return jsonify({'updated': len(inventory), 'inventory': inventory}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk inventory update error: {e}")
+        return jsonify({'error': 'Failed to update inventory'}), 500
+
+
 @bp.route('/<int:store_id>/inventory/<int:product_id>', methods=['PUT'])
 @jwt_required()
 def update_inventory(store_id, product_id):
@@ -216,6 +317,7 @@ def update_inventory(store_id, product_id):
     try:
         inventory.stock = data['stock']
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify(inventory.to_dict()), 200
 
@@ -254,6 +356,7 @@ def delete_inventory(store_id, product_id):
     try:
         db.session.delete(inventory)
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify({'message': 'Inventory deleted'}), 200
 
@@ -318,6 +421,7 @@ def create_store():
         )
         db.session.add(store)
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify(store.to_dict(include_address=True)), 201
 
@@ -392,6 +496,7 @@ def update_store(store_id):
                 store.address_id = address.id
 
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify(store.to_dict(include_address=True)), 200
 
@@ -442,6 +547,7 @@ def delete_store(store_id):
 
         db.session.delete(store)
         db.session.commit()
+        catalog_cache.invalidate()
 
         return jsonify({'message': 'Store deleted successfully'}), 200
 
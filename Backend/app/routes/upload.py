@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, abort
 from flask_jwt_extended import jwt_required, get_jwt
-from app.utils.r2_storage import r2_storage
+from app.utils.local_storage import get_storage
+from app.utils.image_pipeline import image_pipeline, variant_keys
+import uuid
 
 bp = Blueprint('upload', __name__, url_prefix='/api/upload')
 
@@ -47,20 +49,34 @@ def upload_image():
         return jsonify({'error': 'Invalid file type. Only images are allowed.'}), 400
 
     try:
-        print("[LOG] Starting R2 upload...")
-        # Upload to R2
-        url = r2_storage.upload_file(file, folder='products')
+        storage = get_storage()
+        filename = f"{uuid.uuid4()}.{file_ext}"
+        key = f"products/{filename}"
+
+        # Keep the original bytes for the variant workers
+        data = file.read()
+        file.stream.seek(0)
+
+        print("[LOG] Starting storage upload...")
+        url = storage.upload_file(file, filename=filename, folder='products')
         print(f"[LOG] Upload completed. URL: {url}")
 
         if not url:
             print("[LOG] ERROR: Upload returned None")
             return jsonify({'error': 'Failed to upload file'}), 500
 
+        # Thumbnail and WebP variants are generated off the request thread
+        job = image_pipeline.submit(current_app._get_current_object(), storage, data, key, url)
+        variants = None
+        if job:
+            variants = {name: storage.get_file_url(k) for name, k in variant_keys(key).items()}
+
         print("[LOG] SUCCESS: File uploaded successfully")
         print("=" * 80)
         return jsonify({
             'message': 'File uploaded successfully',
-            'url': url
+            'url': url,
+            'variants': variants
         }), 200
 
     except Exception as e:
@@ -70,3 +86,11 @@ def upload_image():
         print(f"[LOG] Traceback:\n{traceback.format_exc()}")
         print("=" * 80)
         return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/files/<path:filename>', methods=['GET'])
+def get_local_file(filename):
+    """Serve files saved by the local storage backend"""
+    if current_app.config.get('STORAGE_BACKEND') != 'local':
+        abort(404)
+    return send_from_directory(current_app.config['LOCAL_STORAGE_DIR'], filename)
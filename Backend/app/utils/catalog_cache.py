@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Values memoized per snapshot; keys come from client parameters, so least recently used are evicted
+MEMO_SIZE = 128
+
+
+class CatalogSnapshot:
+    """Immutable, serialized view of the catalog at one cache version"""
+
+    def __init__(self, version, products, categories, store_names, store_rows):
+        self.version = version
+        self.built_at = time.time()
+        self.products = products          # list of product dicts with stores_inventory
+        self.categories = categories      # sorted list of kinds
+        self.store_names = store_names    # store_id -> name
+        self.store_rows = store_rows      # store_id -> list of inventory dicts
+        self.store_stock = {
+            store_id: {row['product_id']: row['stock'] for row in rows}
+            for store_id, rows in store_rows.items()
+        }
+        self.product_by_id = {p['id']: p for p in products}
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def products_for(self, store_id=None, kind=None):
+        """Return products in stock at store_id and/or of the given kind"""
+        products = self.products
+        if store_id:
+            in_stock = self.store_stock.get(store_id, {})
+            products = [p for p in products if in_stock.get(p['id'], 0) > 0]
+        if kind:
+            products = [p for p in products if p['kind'] == kind]
+        return products
+
+    def memoize(self, key, build):
+        """
+        Memoize a value derived from this snapshot (response bodies, indexes)
+
+        At most MEMO_SIZE values are kept, evicting the least recently used.
+
+        Args:
+            key: Hashable key identifying the value (e.g. route + params)
+            build: Callable producing the value, run once per key
+
+        Returns:
+            The memoized value
+        """
+        with self._memo_lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+
+        cached = build()
+        with self._memo_lock:
+            self._memo[key] = cached
+            self._memo.move_to_end(key)
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return cached
+
+
+class CatalogCache:
+    """
+    Process-wide catalog snapshot shared by all requests
+
+    Write paths call invalidate() after committing, which bumps the version.
+    The next read rebuilds the snapshot once; concurrent readers wait for
+    that single rebuild instead of each hitting the database. Other gunicorn
+    workers never see the bump, so snapshots also expire after
+    CATALOG_CACHE_TTL seconds to bound cross-worker staleness.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Read cache settings from app config"""
+        self.ttl = app.config.get('CATALOG_CACHE_TTL', 30)
+
+    def invalidate(self):
+        """Bump the catalog version after a product or inventory write"""
+        with self._lock:
+            self.version += 1
+
+    def _is_fresh(self, snapshot):
+        if snapshot is None or snapshot.version != self.version:
+            return False
+        return not self.ttl or time.time() - snapshot.built_at < self.ttl
+
+    def get_snapshot(self):
+        """Return the current snapshot, rebuilding it at most once per version"""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+
+        with self._build_lock:
+            # Another thread may have rebuilt while we waited
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                with self._lock:
+                    self.hits += 1
+                return snapshot
+
+            # Capture the version first so a write during the build forces another rebuild
+            version = self.version
+            snapshot = self._build(version)
+            with self._lock:
+                self.misses += 1
+                self._snapshot = snapshot
+            return snapshot
+
+    def _build(self, version):
+        from app import db
+        from app.models.product import Product
+        from app.models.inventory import StoreInventory
+        from app.models.store import Store
+
+        products = Product.query.order_by(Product.id).all()
+        store_names = dict(db.session.query(Store.id, Store.name).all())
+        inventory_items = StoreInventory.query.order_by(
+            StoreInventory.product_id, StoreInventory.store_id
+        ).all()
+
+        inventory_map = {}
+        store_rows = {}
+        for inv in inventory_items:
+            inventory_map.setdefault(inv.product_id, []).append({
+                'store_id': inv.store_id,
+                'store_name': store_names.get(inv.store_id, f'Store {inv.store_id}'),
+                'stock': inv.stock
+            })
+            store_rows.setdefault(inv.store_id, []).append(inv.to_dict())
+
+        product_list = []
+        for p in products:
+            product_dict = p.to_dict()
+            product_dict['stores_inventory'] = inventory_map.get(p.id, [])
+            product_list.append(product_dict)
+
+        categories = sorted({p.kind for p in products if p.kind})
+
+        return CatalogSnapshot(version, product_list, categories, store_names, store_rows)
+
+    def stats(self):
+        """Hit/miss counters for this worker process"""
+        snapshot = self._snapshot
+        return {
+            'pid': os.getpid(),
+            'version': self.version,
+            'snapshot_version': snapshot.version if snapshot else None,
+            'snapshot_age': round(time.time() - snapshot.built_at, 3) if snapshot else None,
+            'products': len(snapshot.products) if snapshot else 0,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,57 @@
+from flask import request
+from sqlalchemy.orm import load_only
+from app.utils.serializers import serializer_for
+
+
+def column_names(model):
+    """Mapped column attribute names of a model"""
+    return [attr.key for attr in model.__mapper__.column_attrs]
+
+
+def parse_fields(model, extra=()):
+    """
+    Parse the ?fields=a,b,c query parameter for a model
+
+    Args:
+        model: SQLAlchemy model whose columns may be requested
+        extra: Names of non-column keys the endpoint can add (e.g. 'items')
+
+    Returns:
+        Tuple of requested names (always including 'id'), or None when absent
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    value = request.args.get('fields')
+    if not value:
+        return None
+
+    allowed = set(column_names(model)) | set(extra)
+    fields = ['id']
+    for name in value.split(','):
+        name = name.strip()
+        if not name or name in fields:
+            continue
+        if name not in allowed:
+            raise ValueError(f'Unknown field: {name}')
+        fields.append(name)
+    return tuple(fields)
+
+
+def load_only_fields(model, fields, also=()):
+    """
+    Loader option that SELECTs only the requested columns
+
+    Args:
+        model: SQLAlchemy model
+        fields: Tuple from parse_fields
+        also: Columns the endpoint needs internally (sort keys, foreign keys)
+    """
+    names = set(column_names(model))
+    wanted = [name for name in list(fields) + list(also) if name in names]
+    return load_only(*[getattr(model, name) for name in dict.fromkeys(wanted)])
+
+
+def select_fields(obj, fields):
+    """Serialize only the requested column attributes of a model instance"""
+    return serializer_for(type(obj), tuple(fields))(obj)
@@ -0,0 +1,57 @@
+import hashlib
+from flask import current_app, request
+from app.utils.serializers import dumps
+
+# Cache-Control policies per kind of read endpoint
+CATALOG_CACHE_CONTROL = 'public, no-cache'          # always revalidate, 304 is cheap
+CATEGORIES_CACHE_CONTROL = 'public, max-age=60'
+PRIVATE_CACHE_CONTROL = 'private, no-cache'         # depends on the caller's token
+
+
+def serialize(payload):
+    """
+    Serialize a payload the same way jsonify does and derive a strong ETag
+
+    Returns:
+        Tuple of (body bytes, etag)
+    """
+    body = dumps(payload, newline=True)
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def version_etag(*parts):
+    """
+    Derive a strong ETag from the values a response is built from
+
+    Lets an endpoint answer If-None-Match without building and serializing
+    the body.
+
+    Args:
+        parts: Values with a stable repr (parameters, fetched row tuples)
+
+    Returns:
+        ETag string
+    """
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def conditional_response(body, etag, cache_control):
+    """
+    Build a JSON response, or an empty 304 when If-None-Match matches
+
+    Args:
+        body: Serialized JSON bytes
+        etag: Strong ETag for body
+        cache_control: Cache-Control header value
+
+    Returns:
+        Flask response
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
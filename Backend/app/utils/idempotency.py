@@ -0,0 +1,249 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Response, current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+# Claim outcomes
+NEW = 'new'
+REPLAY = 'replay'
+IN_PROGRESS = 'in_progress'
+MISMATCH = 'mismatch'
+
+# Database store: delete expired keys every this many claims
+PURGE_INTERVAL = 100
+
+# Default seconds before an unfinished claim (e.g. its worker died) can be taken over
+DEFAULT_LEASE = 60
+
+
+def utcnow():
+    """Naive UTC timestamp for the created_at column"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class MemoryIdempotencyStore:
+    """Per-process idempotency store; for single-worker deployments and tests"""
+
+    def __init__(self, ttl, lease=DEFAULT_LEASE):
+        self.ttl = ttl
+        self.lease = lease
+        self.entries = {}  # scope -> [request_hash, status_code, body, created]
+        self.lock = threading.Lock()
+
+    def claim(self, scope, request_hash):
+        """
+        Reserve a key for a request, or report what is already stored for it
+
+        Returns:
+            Tuple of (NEW | REPLAY | IN_PROGRESS | MISMATCH, (status, body) for REPLAY)
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(scope)
+            if entry and now - entry[3] > self.ttl:
+                entry = None
+            # An unfinished claim past its lease belongs to a request that died
+            if entry and entry[1] is None and now - entry[3] > self.lease:
+                entry = None
+            if entry is None:
+                self.entries[scope] = [request_hash, None, None, now]
+                return NEW, None
+            return _outcome(entry[0], entry[1], entry[2], request_hash)
+
+    def complete(self, scope, status_code, body):
+        with self.lock:
+            entry = self.entries.get(scope)
+            if entry:
+                entry[1], entry[2] = status_code, body
+            # Drop expired keys while holding the lock anyway
+            cutoff = time.monotonic() - self.ttl
+            for expired in [s for s, e in self.entries.items() if e[3] < cutoff]:
+                del self.entries[expired]
+
+    def release(self, scope):
+        with self.lock:
+            self.entries.pop(scope, None)
+
+
+class DatabaseIdempotencyStore:
+    """Idempotency store in the idempotencykey table, shared by all workers"""
+
+    def __init__(self, ttl, lease=DEFAULT_LEASE):
+        self.ttl = ttl
+        self.lease = lease
+        self.claims = 0
+
+    def claim(self, scope, request_hash):
+        """
+        Reserve a key for a request, or report what is already stored for it
+
+        Commits its own transaction, so it must run before the view does any writes.
+        created_at is the claim time while status_code is NULL; an unfinished
+        claim older than the lease is taken over by the next request.
+
+        Returns:
+            Tuple of (NEW | REPLAY | IN_PROGRESS | MISMATCH, (status, body) for REPLAY)
+        """
+        from sqlalchemy.exc import IntegrityError
+        from app import db
+        from app.models.idempotency import IdempotencyKey
+
+        self.claims += 1
+        if self.claims % PURGE_INTERVAL == 0:
+            self.purge()
+
+        now = utcnow()
+        row = db.session.get(IdempotencyKey, scope)
+        if row and row.created_at < now - timedelta(seconds=self.ttl):
+            db.session.delete(row)
+            db.session.flush()
+            row = None
+
+        if row is None:
+            online_id, idem_key, endpoint = scope
+            db.session.add(IdempotencyKey(
+                online_id=online_id, idem_key=idem_key, endpoint=endpoint,
+                request_hash=request_hash, created_at=now
+            ))
+            try:
+                db.session.commit()
+                return NEW, None
+            except IntegrityError:
+                # A concurrent request with the same key claimed it first
+                db.session.rollback()
+                row = db.session.get(IdempotencyKey, scope)
+                if row is None:
+                    return IN_PROGRESS, None
+
+        if row.status_code is None and row.created_at < now - timedelta(seconds=self.lease):
+            # Conditional on the stale claim time so only one concurrent retry takes it over
+            taken = IdempotencyKey.query.filter_by(
+                online_id=scope[0], idem_key=scope[1], endpoint=scope[2], created_at=row.created_at
+            ).filter(IdempotencyKey.status_code.is_(None)).update(
+                {'request_hash': request_hash, 'created_at': now}, synchronize_session=False
+            )
+            db.session.commit()
+            if taken:
+                return NEW, None
+            row = db.session.get(IdempotencyKey, scope)
+            if row is None:
+                return IN_PROGRESS, None
+
+        return _outcome(row.request_hash, row.status_code, row.response_body, request_hash)
+
+    def complete(self, scope, status_code, body):
+        from app import db
+        from app.models.idempotency import IdempotencyKey
+
+        try:
+            IdempotencyKey.query.filter_by(
+                online_id=scope[0], idem_key=scope[1], endpoint=scope[2]
+            ).update({'status_code': status_code, 'response_body': body}, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Idempotency store error: {e}")
+
+    def release(self, scope):
+        from app import db
+        from app.models.idempotency import IdempotencyKey
+
+        try:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(
+                online_id=scope[0], idem_key=scope[1], endpoint=scope[2]
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Idempotency store error: {e}")
+
+    def purge(self):
+        """Delete expired keys"""
+        from app import db
+        from app.models.idempotency import IdempotencyKey
+
+        cutoff = utcnow() - timedelta(seconds=self.ttl)
+        try:
+            IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Idempotency purge error: {e}")
+
+
+def _outcome(stored_hash, status_code, body, request_hash):
+    if stored_hash != request_hash:
+        return MISMATCH, None
+    if status_code is None:
+        return IN_PROGRESS, None
+    return REPLAY, (status_code, body)
+
+
+class Idempotency:
+    """
+    Idempotency-Key support for non-idempotent POST endpoints
+
+    The first request with a key runs normally and its 2xx response is
+    stored; retries with the same key and body get that response replayed
+    without running the view. Failed requests release the key so they can
+    be retried.
+    """
+
+    def __init__(self):
+        self.store = None
+
+    def init_app(self, app):
+        """Pick the store backend from app config"""
+        ttl = app.config.get('IDEMPOTENCY_TTL', 86400)
+        lease = app.config.get('IDEMPOTENCY_LEASE', DEFAULT_LEASE)
+        if app.config.get('IDEMPOTENCY_BACKEND', 'database') == 'memory':
+            self.store = MemoryIdempotencyStore(ttl, lease)
+        else:
+            self.store = DatabaseIdempotencyStore(ttl, lease)
+
+
+idempotency = Idempotency()
+
+
+def idempotent(view):
+    """Honour the Idempotency-Key header on a view (apply below @jwt_required)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key or idempotency.store is None:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+        # Keys are scoped to the caller and endpoint; the body must match on retry
+        scope = (int(get_jwt_identity()), key, request.path)
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        state, stored = idempotency.store.claim(scope, request_hash)
+        if state == REPLAY:
+            status_code, body = stored
+            response = Response(body, status=status_code, mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if state == IN_PROGRESS:
+            return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+        if state == MISMATCH:
+            return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            idempotency.store.release(scope)
+            raise
+
+        if 200 <= response.status_code < 300:
+            idempotency.store.complete(scope, response.status_code, response.get_data(as_text=True))
+        else:
+            idempotency.store.release(scope)
+        return response
+
+    return wrapper
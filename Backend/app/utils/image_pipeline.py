@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; uploads still work without variants
+    Image = None
+
+# (max width, max height) of generated variants
+THUMBNAIL_SIZE = (320, 320)
+WEBP_MAX_SIZE = (1200, 1200)
+
+
+def variant_keys(key):
+    """Object keys of the thumbnail and WebP variants stored next to an original"""
+    # Suffixed so a .webp original is never overwritten by its own variant
+    base = os.path.splitext(key)[0]
+    return {
+        'thumbnail': f"{base}_thumb.webp",
+        'webp': f"{base}_w{WEBP_MAX_SIZE[0]}.webp"
+    }
+
+
+def render_variant(original, size, quality):
+    """Resize (keeping aspect ratio) and encode an image as WebP"""
+    image = ImageOps.exif_transpose(original)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    image.thumbnail(size)
+
+    out = BytesIO()
+    image.save(out, format='WEBP', quality=quality, method=4)
+    return out.getvalue()
+
+
+class ImagePipeline:
+    """
+    Background worker pool producing thumbnail and WebP variants of uploads
+
+    The upload request only stores the original and submits a job; resizing
+    and variant uploads run on pool threads. The variant URLs are saved
+    keyed by the original's URL and set on products already showing that
+    image; products that take the image later pick them up via variants_for.
+    """
+
+    def __init__(self):
+        self.executor = None
+
+    def init_app(self, app):
+        """Create the worker pool from app config"""
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('IMAGE_WORKERS', 2),
+            thread_name_prefix='image-pipeline'
+        )
+
+    @property
+    def enabled(self):
+        return Image is not None and self.executor is not None
+
+    def submit(self, app, storage, data, key, original_url):
+        """
+        Queue variant generation for an uploaded original
+
+        Args:
+            app: Flask app (the job runs outside the request context)
+            storage: Storage backend with upload_bytes()
+            data: Original image bytes
+            key: Object key of the original
+            original_url: Public URL of the original
+
+        Returns:
+            Future resolving to {'thumbnail': url, 'webp': url}, or None if disabled
+        """
+        if not self.enabled:
+            return None
+        return self.executor.submit(self._process, app, storage, data, key, original_url)
+
+    def _process(self, app, storage, data, key, original_url):
+        keys = variant_keys(key)
+        try:
+            original = Image.open(BytesIO(data))
+            urls = {
+                'thumbnail': storage.upload_bytes(render_variant(original, THUMBNAIL_SIZE, 75), keys['thumbnail'], 'image/webp'),
+                'webp': storage.upload_bytes(render_variant(original, WEBP_MAX_SIZE, 82), keys['webp'], 'image/webp')
+            }
+        except Exception as e:
+            print(f"[IMAGE] Failed to generate variants for {key}: {type(e).__name__}: {e}")
+            return None
+
+        if not all(urls.values()):
+            print(f"[IMAGE] Failed to store variants for {key}")
+            return None
+
+        with app.app_context():
+            self._record(urls, original_url)
+        return urls
+
+    def _record(self, urls, original_url):
+        from datetime import datetime, timezone
+        from app import db
+        from app.models.image_variant import ImageVariant
+        from app.models.product import Product
+        from app.utils.catalog_cache import catalog_cache
+
+        try:
+            # Products created or updated with this image later look the variants up here
+            db.session.merge(ImageVariant(
+                original_url=original_url, thumbnail_url=urls['thumbnail'], webp_url=urls['webp'],
+                created_at=datetime.now(timezone.utc).replace(tzinfo=None)
+            ))
+            # Products that already reference the original
+            updated = Product.query.filter(Product.image_url == original_url).update({
+                Product.thumbnail_url: urls['thumbnail'],
+                Product.webp_url: urls['webp']
+            }, synchronize_session=False)
+            db.session.commit()
+            if updated:
+                catalog_cache.invalidate()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[IMAGE] Failed to record variants for {original_url}: {e}")
+
+
+image_pipeline = ImagePipeline()
+
+
+def variants_for(image_url):
+    """
+    Stored variant URLs of an uploaded original
+
+    Args:
+        image_url: URL of the original image
+
+    Returns:
+        Dict with 'thumbnail_url' and 'webp_url', or None if none were generated (yet)
+    """
+    from app.models.image_variant import ImageVariant
+
+    if not image_url:
+        return None
+    variant = ImageVariant.query.get(image_url)
+    if variant is None:
+        return None
+    return {'thumbnail_url': variant.thumbnail_url, 'webp_url': variant.webp_url}
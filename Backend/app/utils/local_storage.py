@@ -0,0 +1,69 @@
+from flask import current_app
+import uuid
+import os
+
+
+class LocalStorage:
+    """Filesystem storage with the same interface as R2Storage (dev and tests)"""
+
+    def __init__(self):
+        self.root = None
+        self.base_url = None
+
+    def init_app(self, app):
+        """Initialize storage directory from app config"""
+        self.root = app.config['LOCAL_STORAGE_DIR']
+        self.base_url = app.config['LOCAL_STORAGE_URL'].rstrip('/')
+
+    def _write(self, data, key):
+        path = os.path.join(self.root, *key.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return self.get_file_url(key)
+
+    def upload_file(self, file_obj, filename=None, folder='products'):
+        """Save an uploaded file and return its URL"""
+        if not filename:
+            ext = os.path.splitext(file_obj.filename)[1]
+            filename = f"{uuid.uuid4()}{ext}"
+
+        try:
+            return self._write(file_obj.read(), f"{folder}/{filename}")
+        except OSError as e:
+            print(f"Error saving file locally: {e}")
+            return None
+
+    def upload_bytes(self, data, key, content_type):
+        """Save raw bytes under key and return its URL"""
+        try:
+            return self._write(data, key)
+        except OSError as e:
+            print(f"Error saving file locally: {e}")
+            return None
+
+    def delete_file(self, file_url):
+        """Delete a file previously returned by upload_file/upload_bytes"""
+        try:
+            key = file_url[len(self.base_url) + 1:]
+            os.remove(os.path.join(self.root, *key.split('/')))
+            return True
+        except OSError as e:
+            print(f"Error deleting local file: {e}")
+            return False
+
+    def get_file_url(self, key):
+        """Generate a URL for a stored file"""
+        return f"{self.base_url}/{key}"
+
+
+local_storage = LocalStorage()
+
+
+def get_storage():
+    """Storage backend selected by STORAGE_BACKEND ('r2' or 'local')"""
+    if current_app.config.get('STORAGE_BACKEND') == 'local':
+        return local_storage
+
+    from app.utils.r2_storage import r2_storage
+    return r2_storage
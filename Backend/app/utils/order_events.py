@@ -0,0 +1,151 @@
+import json
+import queue
+import select
+import threading
+
+# Postgres NOTIFY channel used when ORDER_EVENTS_BACKEND=postgres
+CHANNEL = 'order_events'
+
+# Events per NOTIFY payload (payloads must stay under 8000 bytes)
+NOTIFY_BATCH = 40
+
+# Events buffered per subscriber before it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class OrderEventBus:
+    """
+    In-process pub/sub of compact order-change events for SSE clients
+
+    With the 'memory' backend events only reach subscribers of the worker
+    that made the change. With 'postgres', publish() sends NOTIFY and a
+    listener thread per worker fans notifications out to local subscribers,
+    so every worker sees every change.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.backend = 'memory'
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def init_app(self, app):
+        """Read the backend from app config"""
+        self.app = app
+        self.backend = app.config.get('ORDER_EVENTS_BACKEND', 'memory')
+
+    def subscribe(self):
+        """Register a subscriber queue (starts the LISTEN thread on first use)"""
+        if self.backend == 'postgres':
+            self._ensure_listener()
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, events):
+        """Publish a list of event dicts to every subscriber (in all workers for postgres)"""
+        if not events:
+            return
+        if self.backend == 'postgres':
+            self._notify(events)
+        else:
+            self._fan_out(events)
+
+    def _fan_out(self, events):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            for event in events:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # Slow client: drop its backlog and ask it to reload instead
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait({'type': 'resync'})
+                    break
+
+    def _notify(self, events):
+        from sqlalchemy import text
+        from app import db
+
+        # Separate connection so the NOTIFY does not depend on the request's session state
+        with db.engine.connect() as conn:
+            for start in range(0, len(events), NOTIFY_BATCH):
+                payload = json.dumps(events[start:start + NOTIFY_BATCH], separators=(',', ':'))
+                conn.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': CHANNEL, 'payload': payload})
+            conn.commit()
+
+    def _ensure_listener(self):
+        with self.lock:
+            if self.listener and self.listener.is_alive():
+                return
+            self.listener = threading.Thread(target=self._listen, name='order-events-listener', daemon=True)
+            self.listener.start()
+
+    def _listen(self):
+        from app import db
+
+        with self.app.app_context():
+            conn = db.engine.raw_connection()
+        try:
+            dbapi_conn = conn.driver_connection
+            dbapi_conn.autocommit = True
+            cursor = dbapi_conn.cursor()
+            cursor.execute(f'LISTEN {CHANNEL}')
+            while True:
+                if select.select([dbapi_conn], [], [], 30) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    notify = dbapi_conn.notifies.pop(0)
+                    try:
+                        self._fan_out(json.loads(notify.payload))
+                    except ValueError:
+                        continue
+        except Exception as e:
+            print(f"[EVENTS] Order event listener stopped: {e}")
+        finally:
+            conn.close()
+
+
+order_events = OrderEventBus()
+
+
+def publish_order_changes(order_ids, change):
+    """
+    Publish one compact event per order after a committed change
+
+    Args:
+        order_ids: Ids of the changed orders
+        change: 'created', 'status', 'payment' or 'cancelled'
+    """
+    from app.models.order import Orders
+
+    if not order_ids:
+        return
+    try:
+        rows = Orders.query.with_entities(
+            Orders.id, Orders.customer_id, Orders.store_id, Orders.sales_id,
+            Orders.pickup_status, Orders.payment_status
+        ).filter(Orders.id.in_(list(order_ids))).all()
+        order_events.publish([
+            {
+                'type': change,
+                'id': row.id,
+                'customer_id': row.customer_id,
+                'store_id': row.store_id,
+                'sales_id': row.sales_id,
+                'pickup_status': row.pickup_status,
+                'payment_status': row.payment_status
+            }
+            for row in rows
+        ])
+    except Exception as e:
+        print(f"[EVENTS] Failed to publish order changes: {e}")
@@ -0,0 +1,63 @@
+from sqlalchemy import or_, false
+
+# Resolved id sets larger than this are filtered with a subquery instead of a literal IN list
+MAX_RESOLVED_IDS = 1000
+
+
+def like_pattern(term):
+    """Substring ILIKE pattern with LIKE wildcards in the term escaped"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def resolve_ids(session, query):
+    """Materialize a single-column id query, or return it as a subquery if it is large"""
+    ids = [row[0] for row in query.limit(MAX_RESOLVED_IDS + 1).all()]
+    if len(ids) > MAX_RESOLVED_IDS:
+        return query.statement
+    return ids
+
+
+def order_search_filter(session, term):
+    """
+    Filter clause matching orders by customer name/email or product name
+
+    Matching customers and products are looked up first through the trigram
+    indexes (idx_onlineaccount_name_trgm, idx_onlineaccount_email_trgm,
+    idx_product_name_trgm); orders are then filtered by those id sets, so no
+    join or DISTINCT over the orders table is needed.
+
+    Args:
+        session: SQLAlchemy session
+        term: Search text
+
+    Returns:
+        SQLAlchemy boolean clause for Orders
+    """
+    from app.models.account import OnlineAccount
+    from app.models.customer import Customer
+    from app.models.order import Orders, OrderItem
+    from app.models.product import Product
+
+    pattern = like_pattern(term)
+
+    customer_ids = resolve_ids(session, session.query(Customer.id).join(
+        OnlineAccount, Customer.online_id == OnlineAccount.online_id
+    ).filter(or_(
+        OnlineAccount.name.ilike(pattern, escape='\\'),
+        OnlineAccount.email.ilike(pattern, escape='\\')
+    )))
+
+    product_ids = resolve_ids(session, session.query(Product.id).filter(
+        Product.product_name.ilike(pattern, escape='\\')
+    ))
+
+    clauses = []
+    if not isinstance(customer_ids, list) or customer_ids:
+        clauses.append(Orders.customer_id.in_(customer_ids))
+    if not isinstance(product_ids, list) or product_ids:
+        clauses.append(Orders.id.in_(
+            session.query(OrderItem.order_id).filter(OrderItem.product_id.in_(product_ids))
+        ))
+
+    return or_(*clauses) if clauses else false()
@@ -0,0 +1,91 @@
+import base64
+import json
+
+
+def encode_cursor(*values):
+    """
+    Encode the sort key of the last row on a page into an opaque cursor
+
+    Args:
+        values: JSON-serializable sort key values (e.g. name, id)
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string from the client
+        size: Expected number of values in the sort key
+
+    Returns:
+        List of sort key values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_limit(value, default=50, maximum=200):
+    """Clamp a page size query parameter to [1, maximum]"""
+    if value is None:
+        return default
+    return max(1, min(value, maximum))
+
+
+# Default cap for count=capped totals
+COUNT_CAP = 1000
+
+
+def count_rows(query, mode='capped', cap=COUNT_CAP):
+    """
+    Count the rows of a filtered query as cheaply as the client allows
+
+    Args:
+        query: SQLAlchemy Query (ordering and pagination are ignored)
+        mode: 'exact', 'capped' (stop counting after cap rows), 'estimate'
+              (Postgres planner estimate, capped elsewhere) or 'none'
+        cap: Row limit for capped counts
+
+    Returns:
+        Tuple of (total or None, whether the total is exact)
+    """
+    query = query.order_by(None)
+
+    if mode == 'none':
+        return None, False
+
+    if mode == 'exact':
+        return query.count(), True
+
+    if mode == 'estimate':
+        session = query.session
+        if session.get_bind().dialect.name == 'postgresql':
+            # Expand IN (...) parameters; EXPLAIN gets the final SQL text
+            compiled = query.statement.compile(
+                dialect=session.get_bind().dialect,
+                compile_kwargs={'render_postcompile': True}
+            )
+            plan = session.connection().exec_driver_sql(
+                'EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params
+            ).scalar()
+            return int(plan[0]['Plan']['Plan Rows']), False
+
+    # Count at most cap + 1 rows to know whether the cap was hit
+    total = query.limit(cap + 1).count()
+    return min(total, cap), total <= cap
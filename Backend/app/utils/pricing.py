@@ -0,0 +1,58 @@
+from app.models.product import Product
+
+# Largest price the BIGINT price column holds
+MAX_PRICE = 2 ** 63 - 1
+
+
+def quoted_prices(items):
+    """
+    Map product_id -> unit price the client showed, for items that sent one
+
+    Returns:
+        Tuple of ({product_id: cents}, error)
+    """
+    quoted = {}
+    for index, item in enumerate(items):
+        price = item.get('price') if isinstance(item, dict) else None
+        if price is None:
+            continue
+        if isinstance(price, bool) or not isinstance(price, int) or not 0 <= price <= MAX_PRICE:
+            return None, f'Item {index}: price must be a non-negative integer number of cents'
+        quoted[item.get('product_id')] = price
+    return quoted, None
+
+
+def price_lines(session, lines, quoted=None):
+    """
+    Price order lines from the product table with one IN query
+
+    Args:
+        session: SQLAlchemy session
+        lines: {(store_id, product_id): quantity}
+        quoted: Optional {product_id: unit price} the client expected
+
+    Returns:
+        Tuple of (sub prices {(store_id, product_id): cents},
+        price changes [{product_id, quoted_price, price}], missing product ids)
+    """
+    product_ids = {product_id for _, product_id in lines}
+    prices = dict(
+        session.query(Product.id, Product.price).filter(Product.id.in_(product_ids)).all()
+    )
+
+    missing = sorted(product_ids - set(prices))
+    sub_prices = {
+        key: prices[key[1]] * quantity
+        for key, quantity in lines.items() if key[1] in prices
+    }
+
+    changes = []
+    for product_id, price in sorted((quoted or {}).items(), key=lambda item: str(item[0])):
+        if product_id in prices and price != prices[product_id]:
+            changes.append({
+                'product_id': product_id,
+                'quoted_price': price,
+                'price': prices[product_id]
+            })
+
+    return sub_prices, changes, missing
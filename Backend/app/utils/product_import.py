@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+import tempfile
+from sqlalchemy import insert
+from app.utils.pricing import MAX_PRICE
+
+# Columns accepted by the importer, in COPY order
+IMPORT_COLUMNS = ['product_name', 'price', 'kind', 'description', 'image_url']
+MAX_LENGTHS = {'product_name': 140, 'kind': 70, 'image_url': 255}
+
+# Rows per executemany batch on non-Postgres databases
+INSERT_BATCH_SIZE = 1000
+
+# Per-row errors returned to the client (the count is always exact)
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be parsed past a line (e.g. malformed CSV)"""
+
+    def __init__(self, line_num, message):
+        super().__init__(f'Line {line_num}: {message}')
+        self.line_num = line_num
+
+
+def read_rows(stream, fmt):
+    """
+    Iterate (line number, dict) pairs from a CSV or JSONL byte stream
+
+    Rows that cannot be parsed are yielded as (line number, error string).
+
+    Raises:
+        ImportFormatError: If the CSV itself is malformed (reading cannot resume)
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except csv.Error as e:
+            # line_num counts completed lines; the bad record starts on the next one
+            raise ImportFormatError(reader.line_num + 1, str(e))
+        return
+
+    for line_num, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_num, 'Invalid JSON'
+            continue
+        yield line_num, row if isinstance(row, dict) else 'Each line must be a JSON object'
+
+
+def validate_row(row):
+    """
+    Normalize one import row
+
+    Returns:
+        Tuple of (values dict, None) or (None, error message)
+    """
+    if not isinstance(row, dict):
+        return None, row
+
+    name = str(row.get('product_name') or '').strip()
+    if not name:
+        return None, 'product_name is required'
+
+    price = row.get('price')
+    try:
+        if isinstance(price, bool) or price in (None, ''):
+            raise ValueError
+        if isinstance(price, float) and not price.is_integer():
+            raise ValueError
+        price = int(price)
+    except (TypeError, ValueError, OverflowError):
+        return None, 'price must be an integer number of cents'
+    if price < 0:
+        return None, 'price must not be negative'
+    if price > MAX_PRICE:
+        return None, f'price must be at most {MAX_PRICE} cents'
+
+    values = {'product_name': name, 'price': price}
+    for column in ['kind', 'description', 'image_url']:
+        value = row.get(column)
+        value = str(value).strip() if value is not None else ''
+        values[column] = value or None
+
+    for column, max_length in MAX_LENGTHS.items():
+        if values[column] and len(values[column]) > max_length:
+            return None, f'{column} exceeds {max_length} characters'
+
+    return values, None
+
+
+def copy_rows(session, spool):
+    """Load a spooled CSV of valid rows with COPY FROM STDIN (Postgres)"""
+    # Unquoted empty fields are NULL in COPY csv format
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY product ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            spool
+        )
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def insert_rows(session, spool):
+    """Load a spooled CSV of valid rows with batched multi-row INSERTs"""
+    from app.models.product import Product
+
+    count = 0
+    batch = []
+    for record in csv.reader(spool):
+        values = {column: (value or None) for column, value in zip(IMPORT_COLUMNS, record)}
+        values['price'] = int(values['price'])
+        batch.append(values)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            session.execute(insert(Product), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        session.execute(insert(Product), batch)
+        count += len(batch)
+    return count
+
+
+def import_products(session, stream, fmt, strict=False):
+    """
+    Validate and load products from a CSV/JSONL stream in one transaction
+
+    Valid rows are spooled as CSV while the stream is read, so invalid rows
+    can be reported without holding the whole file in memory. The caller
+    commits.
+
+    Args:
+        session: SQLAlchemy session
+        stream: Binary file-like object
+        fmt: 'csv' or 'jsonl'
+        strict: Load nothing if any row is invalid
+
+    Returns:
+        Dict with imported count, error_count and errors
+    """
+    errors = []
+    error_count = 0
+
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode='w+', newline='') as spool:
+        writer = csv.writer(spool)
+        for line_num, row in read_rows(stream, fmt):
+            values, error = validate_row(row)
+            if error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_num, 'error': error})
+                continue
+            writer.writerow(['' if values[c] is None else values[c] for c in IMPORT_COLUMNS])
+
+        imported = 0
+        if not (strict and error_count):
+            spool.seek(0)
+            if session.get_bind().dialect.name == 'postgresql':
+                imported = copy_rows(session, spool)
+            else:
+                imported = insert_rows(session, spool)
+
+    return {'imported': imported, 'error_count': error_count, 'errors': errors}
@@ -0,0 +1,127 @@
+import bisect
+import re
+from sqlalchemy import text
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Field weights; mirror the A/B/C setweight labels of the Postgres index
+FIELD_WEIGHTS = (
+    ('product_name', 1.0),
+    ('kind', 0.4),
+    ('description', 0.2),
+)
+
+# Must match idx_product_search in Table_postgres.sql exactly so the GIN index is used
+SEARCH_DOCUMENT_SQL = """(
+    setweight(to_tsvector('english', coalesce(p.product_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(p.kind, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(p.description, '')), 'C')
+)"""
+
+
+def tokenize(value):
+    """Lowercase alphanumeric tokens of a string"""
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over the catalog snapshot
+
+    Used when the database is not Postgres (e.g. SQLite test runs). Every
+    query token is treated as a prefix, and a product must match all tokens.
+    """
+
+    def __init__(self, products):
+        self.postings = {}  # term -> {product_id: score}
+        for product in products:
+            for field, weight in FIELD_WEIGHTS:
+                for term in tokenize(product.get(field)):
+                    scores = self.postings.setdefault(term, {})
+                    scores[product['id']] = scores.get(product['id'], 0) + weight
+        self.terms = sorted(self.postings)
+
+    def _prefix_scores(self, token):
+        scores = {}
+        start = bisect.bisect_left(self.terms, token)
+        for term in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            for product_id, score in self.postings[term].items():
+                scores[product_id] = scores.get(product_id, 0) + score
+        return scores
+
+    def search(self, tokens):
+        """
+        Rank products matching every token
+
+        Returns:
+            List of (product_id, score) sorted by score desc, id asc
+        """
+        ranked = None
+        for token in tokens:
+            scores = self._prefix_scores(token)
+            if ranked is None:
+                ranked = scores
+            else:
+                ranked = {pid: ranked[pid] + score for pid, score in scores.items() if pid in ranked}
+            if not ranked:
+                return []
+        return sorted(ranked.items(), key=lambda item: (-item[1], item[0]))
+
+
+def search_postgres(session, tokens, store_id, limit, offset):
+    """
+    Ranked full-text search through the idx_product_search GIN index
+
+    Returns:
+        Tuple of (list of (product_id, rank), total matches)
+    """
+    # Prefix-match every token so results update while the user types
+    ts_query = ' & '.join(f'{token}:*' for token in tokens)
+    store_filter = ''
+    params = {'ts_query': ts_query, 'limit': limit, 'offset': offset}
+    if store_id:
+        store_filter = """AND EXISTS (
+            SELECT 1 FROM storeinventory si
+            WHERE si.product_id = p.id AND si.store_id = :store_id AND si.stock > 0
+        )"""
+        params['store_id'] = store_id
+
+    rows = session.execute(text(f"""
+        SELECT p.id, ts_rank({SEARCH_DOCUMENT_SQL}, q.query) AS rank, COUNT(*) OVER () AS total
+        FROM product p, to_tsquery('english', :ts_query) AS q(query)
+        WHERE {SEARCH_DOCUMENT_SQL} @@ q.query
+        {store_filter}
+        ORDER BY rank DESC, p.id
+        LIMIT :limit OFFSET :offset
+    """), params).fetchall()
+
+    if rows:
+        total = rows[0].total
+    elif offset:
+        # Past the last hit the window count is unavailable; count the matches on their own
+        total = session.execute(text(f"""
+            SELECT COUNT(*)
+            FROM product p, to_tsquery('english', :ts_query) AS q(query)
+            WHERE {SEARCH_DOCUMENT_SQL} @@ q.query
+            {store_filter}
+        """), {k: v for k, v in params.items() if k not in ('limit', 'offset')}).scalar()
+    else:
+        total = 0
+    return [(row.id, float(row.rank)) for row in rows], total
+
+
+def search_memory(snapshot, tokens, store_id, limit, offset):
+    """
+    Ranked search over the catalog snapshot's inverted index
+
+    Returns:
+        Tuple of (list of (product_id, score), total matches)
+    """
+    index = snapshot.memoize(('search_index',), lambda: InvertedIndex(snapshot.products))
+    ranked = index.search(tokens)
+    if store_id:
+        in_stock = snapshot.store_stock.get(store_id, {})
+        ranked = [(pid, score) for pid, score in ranked if in_stock.get(pid, 0) > 0]
+    return ranked[offset:offset + limit], len(ranked)
@@ -68,6 +68,30 @@ class R2Storage:
             print(f"[R2] Traceback:\n{traceback.format_exc()}")
             return None
 
+    def upload_bytes(self, data, key, content_type):
+        """
+        Upload raw bytes (e.g. a generated image variant) to R2 storage
+
+        Args:
+            data: File contents
+            key: Object key including folder
+            content_type: MIME type
+
+        Returns:
+            Public URL of uploaded file, or None on failure
+        """
+        try:
+            self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=data,
+                ContentType=content_type
+            )
+            return self.get_file_url(key)
+        except Exception as e:
+            print(f"[R2] ERROR uploading bytes to R2: {type(e).__name__}: {e}")
+            return None
+
     def delete_file(self, file_url):
         """Delete a file from R2 storage"""
         try:
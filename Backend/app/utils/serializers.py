@@ -0,0 +1,113 @@
+import json
+from functools import lru_cache
+import pytz
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import DateTime
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+# US Eastern timezone
+EASTERN_TZ = pytz.timezone('America/New_York')
+
+# Same output as Flask's default provider: sorted keys, compact, Decimal/date via its default
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+@lru_cache(maxsize=8192)
+def eastern_offset(utc_hour):
+    """UTC offset of Eastern time during a (naive, UTC) hour; DST only changes on the hour"""
+    return pytz.utc.localize(utc_hour).astimezone(EASTERN_TZ).utcoffset()
+
+
+def format_eastern(value):
+    """Format a timestamp as Eastern time; naive values are assumed to be Eastern already"""
+    if not value:
+        return None
+    if value.tzinfo is not None:
+        utc = value.replace(tzinfo=None) - value.utcoffset()
+        value = utc + eastern_offset(utc.replace(minute=0, second=0, microsecond=0))
+    return '%04d-%02d-%02d %02d:%02d:%02d ET' % (
+        value.year, value.month, value.day, value.hour, value.minute, value.second
+    )
+
+
+def compile_serializer(model, fields=None, exclude=()):
+    """
+    Generate a to_dict function for a model from its column metadata
+
+    The function is compiled once and reads each column with a plain
+    attribute access in a single dict literal; DateTime columns are
+    formatted with format_eastern.
+
+    Args:
+        model: SQLAlchemy model
+        fields: Column names to include, in order (default: all columns)
+        exclude: Column names to leave out (e.g. password hashes)
+
+    Returns:
+        Callable mapping an instance to a dict
+    """
+    columns = {column.key: column for column in model.__table__.columns}
+    names = [name for name in (fields or columns) if name in columns and name not in exclude]
+
+    entries = []
+    for name in names:
+        if isinstance(columns[name].type, DateTime):
+            entries.append(f"{name!r}: format_eastern(obj.{name})")
+        else:
+            entries.append(f"{name!r}: obj.{name}")
+    source = f"def serialize(obj):\n    return {{{', '.join(entries)}}}\n"
+
+    namespace = {'format_eastern': format_eastern}
+    exec(compile(source, f'<serializer {model.__name__}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+@lru_cache(maxsize=256)
+def serializer_for(model, fields):
+    """Compiled serializer for a ?fields= selection (a tuple from parse_fields)"""
+    return compile_serializer(model, fields)
+
+
+def dumps(payload, newline=False):
+    """
+    Serialize a payload to JSON bytes (orjson when installed)
+
+    Args:
+        payload: JSON-serializable object
+        newline: Append '\\n' like jsonify does
+
+    Returns:
+        UTF-8 encoded bytes
+    """
+    if orjson is not None:
+        option = ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE if newline else ORJSON_OPTIONS
+        try:
+            return orjson.dumps(payload, default=DefaultJSONProvider.default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which json encodes like Flask always did
+            pass
+    body = json.dumps(payload, default=DefaultJSONProvider.default, sort_keys=True, separators=(',', ':'))
+    return (body + '\n' if newline else body).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson; pretty debug output still uses json"""
+
+    def _pretty(self):
+        return orjson is None or (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or self._pretty():
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if self._pretty():
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, newline=True), mimetype=self.mimetype)
@@ -0,0 +1,209 @@
+from sqlalchemy import bindparam, case, text
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.inventory import StoreInventory
+
+# Dialects whose insert() supports ON CONFLICT ... DO UPDATE
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class InsufficientStock(Exception):
+    """Raised when a reservation cannot be satisfied for every line"""
+
+    def __init__(self, lines):
+        self.lines = lines  # list of (store_id, product_id) that were short
+        super().__init__(f'Insufficient stock for {len(lines)} line(s)')
+
+
+def parse_order_lines(items, store_id=None):
+    """
+    Merge order items into reservation lines
+
+    Args:
+        items: List of {'product_id', 'quantity'} with optional 'store_id'
+        store_id: The order's store for single-store orders; items may then
+                  only repeat it, never name another store
+
+    Returns:
+        Tuple of ({(store_id, product_id): quantity}, error)
+    """
+    if not isinstance(items, list) or not items:
+        return None, 'items must be a non-empty list'
+
+    lines = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f'Item {index} must be an object'
+        if store_id is not None and item.get('store_id', store_id) != store_id:
+            return None, f"Item {index}: store_id must match the order's store_id"
+        key = (item.get('store_id', store_id), item.get('product_id'))
+        quantity = item.get('quantity')
+        if any(isinstance(v, bool) or not isinstance(v, int) for v in (*key, quantity)):
+            return None, f'Item {index}: store_id, product_id and quantity must be integers'
+        if quantity <= 0:
+            return None, f'Item {index}: quantity must be positive'
+        lines[key] = lines.get(key, 0) + quantity
+    return lines, None
+
+
+def reserve_stock(session, lines):
+    """
+    Decrement stock for all order lines with one conditional UPDATE
+
+    Each row is only decremented while stock >= quantity, so concurrent
+    checkouts cannot oversell: the row lock taken by the UPDATE serializes
+    them and the losing transaction re-checks the condition. The caller must
+    roll back when this raises, which restores any lines already reserved.
+
+    Args:
+        session: SQLAlchemy session
+        lines: {(store_id, product_id): quantity}
+
+    Raises:
+        InsufficientStock: If any line could not be reserved
+    """
+    # Rows in (store_id, product_id) order so concurrent checkouts lock them
+    # in the same order instead of deadlocking
+    params = {}
+    values = []
+    for i, ((store_id, product_id), quantity) in enumerate(sorted(lines.items())):
+        values.append(f'(:s{i}, :p{i}, :q{i})')
+        params.update({f's{i}': store_id, f'p{i}': product_id, f'q{i}': quantity})
+
+    reserved = session.execute(text(f"""
+        WITH v(line_store_id, line_product_id, qty) AS (VALUES {', '.join(values)})
+        UPDATE storeinventory
+        SET stock = stock - v.qty
+        FROM v
+        WHERE store_id = v.line_store_id AND product_id = v.line_product_id AND stock >= v.qty
+        RETURNING store_id, product_id
+    """), params).fetchall()
+
+    if len(reserved) < len(lines):
+        short = set(lines) - {(row.store_id, row.product_id) for row in reserved}
+        raise InsufficientStock(sorted(short))
+
+
+def restore_stock(session, order_ids):
+    """
+    Return the stock of one or many orders to their stores with one UPDATE
+
+    Quantities are summed per (store, product) across all the orders first,
+    so each inventory row is updated once. The caller is responsible for
+    only passing orders whose stock is still reserved (see the status guard
+    in the cancel endpoints) and for committing.
+
+    Returns:
+        Number of inventory rows updated
+    """
+    if not order_ids:
+        return 0
+
+    result = session.execute(text("""
+        UPDATE storeinventory
+        SET stock = stock + r.qty
+        FROM (
+            SELECT o.store_id AS line_store_id, oi.product_id AS line_product_id, SUM(oi.quantity) AS qty
+            FROM orderitem oi
+            JOIN orders o ON o.id = oi.order_id
+            WHERE oi.order_id IN :order_ids
+            GROUP BY o.store_id, oi.product_id
+        ) AS r
+        WHERE store_id = r.line_store_id AND product_id = r.line_product_id
+    """).bindparams(bindparam('order_ids', expanding=True)), {'order_ids': list(order_ids)})
+    return result.rowcount
+
+
+def parse_stock_items(items):
+    """
+    Normalize a bulk inventory payload
+
+    Args:
+        items: List of {'product_id', 'stock'} (absolute) or {'product_id', 'delta'} (relative)
+
+    Returns:
+        Tuple of (stock levels dict, deltas dict, error). Duplicate product ids
+        are merged: the last absolute level wins and deltas are summed.
+    """
+    if not isinstance(items, list) or not items:
+        return None, None, 'items must be a non-empty list'
+
+    levels = {}
+    deltas = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, None, f'Item {index} must be an object'
+
+        product_id = item.get('product_id')
+        if isinstance(product_id, bool) or not isinstance(product_id, int):
+            return None, None, f'Item {index}: product_id must be an integer'
+
+        if ('stock' in item) == ('delta' in item):
+            return None, None, f'Item {index}: give exactly one of stock or delta'
+
+        value = item.get('stock', item.get('delta'))
+        if isinstance(value, bool) or not isinstance(value, int):
+            return None, None, f'Item {index}: stock and delta must be integers'
+
+        if 'stock' in item:
+            if value < 0:
+                return None, None, f'Item {index}: stock must not be negative'
+            levels[product_id] = value
+        else:
+            deltas[product_id] = deltas.get(product_id, 0) + value
+
+    both = set(levels) & set(deltas)
+    if both:
+        return None, None, f'Product {min(both)} has both stock and delta'
+
+    return levels, deltas, None
+
+
+def upsert_stock(session, store_id, levels, deltas):
+    """
+    Apply absolute stock levels and deltas for one store with INSERT ... ON CONFLICT
+
+    Runs one statement per kind of change (at most two) inside the caller's
+    transaction. Deltas are clamped at zero; a delta for a product the store
+    does not carry yet creates the row. The caller validates product ids and
+    commits.
+
+    Returns:
+        List of resulting inventory dicts
+    """
+    insert = UPSERT_DIALECTS[session.get_bind().dialect.name]
+    table = StoreInventory.__table__
+    rows = []
+
+    if levels:
+        stmt = insert(table).values([
+            {'store_id': store_id, 'product_id': product_id, 'stock': stock}
+            for product_id, stock in levels.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.store_id, table.c.product_id],
+            set_={'stock': stmt.excluded.stock}
+        )
+        rows.extend(session.execute(stmt.returning(table)).mappings().all())
+
+    if deltas:
+        stmt = insert(table).values([
+            {'store_id': store_id, 'product_id': product_id, 'stock': max(delta, 0)}
+            for product_id, delta in deltas.items()
+        ])
+        # excluded.stock is clamped above, so recompute from the original deltas
+        delta = case(
+            {product_id: value for product_id, value in deltas.items()},
+            value=table.c.product_id,
+            else_=0
+        )
+        new_stock = table.c.stock + delta
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.store_id, table.c.product_id],
+            set_={'stock': case((new_stock < 0, 0), else_=new_stock)}
+        )
+        rows.extend(session.execute(stmt.returning(table)).mappings().all())
+
+    return sorted((dict(row) for row in rows), key=lambda row: row['product_id'])
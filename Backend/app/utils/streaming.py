@@ -0,0 +1,60 @@
+from itertools import islice
+from flask import Response, request, stream_with_context
+from app.utils.serializers import dumps
+
+# Rows fetched per server-side cursor round trip and per chunk written
+STREAM_BATCH_SIZE = 500
+
+
+def wants_stream():
+    """True when the client opted into streaming with ?stream=1"""
+    return request.args.get('stream', '').lower() in ['1', 'true', 'yes']
+
+
+def iter_batches(query, size=STREAM_BATCH_SIZE):
+    """
+    Iterate a query in lists of rows through a server-side cursor
+
+    Args:
+        query: SQLAlchemy Query (must not joinedload collections)
+        size: Rows per batch
+
+    Yields:
+        Lists of at most size rows
+    """
+    rows = iter(query.yield_per(size))
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_json_array(batches, serialize, key=None):
+    """
+    Stream a JSON array with chunked transfer encoding
+
+    Only one batch of rows and its serialized form are held in memory at a
+    time, and the first bytes reach the client before the query finishes.
+
+    Args:
+        batches: Iterable of row lists (see iter_batches)
+        serialize: Callable mapping a batch to a list of JSON-serializable dicts
+        key: If given, wrap the array as {key: [...]} to match the non-streaming shape
+
+    Returns:
+        Streaming Flask response
+    """
+    def generate():
+        yield f'{{"{key}":['.encode('utf-8') if key else b'['
+        first = True
+        for batch in batches:
+            items = serialize(batch)
+            if not items:
+                continue
+            chunk = b','.join(dumps(item) for item in items)
+            yield chunk if first else b',' + chunk
+            first = False
+        yield b']}\n' if key else b']\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,144 @@
+"""
+SmartShelf Serializer Benchmark
+===============================
+Micro-benchmark of the order list payload: 10k orders with 3 items each
+(the shape of GET /api/orders?include_items=1), serialized with the
+original hand-written to_dict + stdlib json versus the compiled model
+serializers + orjson.
+
+No database is needed; orders are built as transient model instances.
+
+Usage:
+    python dev/bench_serializers.py [--orders 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from app.models.order import EASTERN_TZ, Orders, OrderItem
+from app.models.product import Product
+from app.utils import serializers
+
+
+def legacy_format_eastern(value):
+    if not value:
+        return None
+    if value.tzinfo is None:
+        value_et = EASTERN_TZ.localize(value)
+    else:
+        value_et = value.astimezone(EASTERN_TZ)
+    return value_et.strftime('%Y-%m-%d %H:%M:%S ET')
+
+
+def legacy_product(product):
+    return {
+        'id': product.id,
+        'product_name': product.product_name,
+        'price': product.price,
+        'kind': product.kind,
+        'description': product.description,
+        'image_url': product.image_url,
+        'thumbnail_url': product.thumbnail_url,
+        'webp_url': product.webp_url
+    }
+
+
+def legacy_order(order):
+    return {
+        'id': order.id,
+        'customer_id': order.customer_id,
+        'store_id': order.store_id,
+        'sales_id': order.sales_id,
+        'order_date': legacy_format_eastern(order.order_date),
+        'pickup_date': legacy_format_eastern(order.pickup_date),
+        'total_amount': order.total_amount,
+        'payment_status': order.payment_status,
+        'pickup_status': order.pickup_status,
+        'items': [
+            {
+                'id': item.id,
+                'order_id': item.order_id,
+                'product_id': item.product_id,
+                'quantity': item.quantity,
+                'sub_price': item.sub_price,
+                'product': legacy_product(item.product) if item.product else None
+            }
+            for item in order.items
+        ]
+    }
+
+
+def legacy_dumps(payload):
+    # What Flask's default provider does for jsonify outside debug mode
+    return json.dumps(payload, default=DefaultJSONProvider.default, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def build_orders(count):
+    products = [
+        Product(id=i, product_name=f'Product {i}', price=1999 + i, kind='Phone',
+                description=f'Description of product {i}', image_url=f'/img/{i}.jpg',
+                thumbnail_url=f'/img/{i}_thumb.jpg', webp_url=f'/img/{i}.webp')
+        for i in range(1, 101)
+    ]
+    start = datetime(2024, 1, 1, 9, 0, 0)
+    orders = []
+    for i in range(1, count + 1):
+        placed = start + timedelta(minutes=37 * i)
+        order = Orders(id=i, customer_id=i % 500 + 1, store_id=i % 20 + 1, sales_id=i % 50 + 1,
+                       order_date=placed, pickup_date=placed + timedelta(days=1),
+                       total_amount=12345, payment_status=bool(i % 2), pickup_status=i % 4)
+        order.items = [
+            OrderItem(id=i * 3 + n, order_id=i, product_id=product.id, quantity=n + 1,
+                      sub_price=product.price * (n + 1), product=product)
+            for n, product in enumerate(products[i % 98:i % 98 + 3])
+        ]
+        orders.append(order)
+    return orders
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - began)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order list serialization")
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders)
+    print(f"📦 {len(orders)} orders, {sum(len(o.items) for o in orders)} items, best of {args.repeat}")
+    print(f"   encoder: {'orjson' if serializers.orjson is not None else 'json (orjson not installed)'}")
+
+    legacy_dicts, legacy = best_of(args.repeat, lambda: [legacy_order(o) for o in orders])
+    compiled_dicts, compiled = best_of(args.repeat, lambda: [o.to_dict(include_items=True) for o in orders])
+    assert legacy == compiled, "compiled serializers changed the payload"
+
+    legacy_encode, legacy_body = best_of(args.repeat, lambda: legacy_dumps({'orders': legacy}))
+    fast_encode, fast_body = best_of(args.repeat, lambda: serializers.dumps({'orders': compiled}))
+    assert json.loads(legacy_body) == json.loads(fast_body), "encoders disagree"
+
+    rows = [
+        ('to_dict', legacy_dicts, compiled_dicts),
+        ('encode', legacy_encode, fast_encode),
+        ('total', legacy_dicts + legacy_encode, compiled_dicts + fast_encode),
+    ]
+    print(f"{'stage':<10}{'legacy ms':>12}{'compiled ms':>14}{'speedup':>10}")
+    for stage, before, after in rows:
+        print(f"{stage:<10}{before * 1000:>12.1f}{after * 1000:>14.1f}{before / after:>9.1f}x")
+    print(f"✅ Payload {len(fast_body) / 1024:.0f} KiB, identical output")
+
+
+if __name__ == "__main__":
+    main()
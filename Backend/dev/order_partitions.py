@@ -0,0 +1,325 @@
+"""
+SmartShelf Order Partitioning Tool
+==================================
+Optional monthly range partitioning of the orders table on order_date.
+
+Commands:
+    migrate   Convert the plain orders table from Table_postgres.sql into a
+              partitioned table (one transaction; data is copied)
+    ensure    Create partitions for the coming months (run monthly, e.g. cron)
+    archive   Detach partitions older than a cutoff whose orders are all
+              completed or cancelled, moving their order items alongside
+              (old rows in the default partition are split out and included)
+
+Orders are keyed by (id, order_date) once partitioned. orderitem stays a
+single table but gains an order_date column, filled from its order by an
+insert trigger (the app does not need to know about it), so its foreign
+key becomes (order_id, order_date) -> orders and the items of a month can
+be found by an order_date range. archive moves the items of archived
+orders into orderitem_archive before detaching their partition.
+
+Usage:
+    python dev/order_partitions.py migrate [--months-ahead 3] [--dry-run]
+    python dev/order_partitions.py ensure [--months-ahead 3]
+    python dev/order_partitions.py archive --before 2025-01 [--drop] [--dry-run]
+
+Requirements:
+    - .env file with DATABASE_URL configured
+"""
+import argparse
+import os
+import sys
+from datetime import date
+import psycopg2
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Indexes of the partitioned table (mirror Table_postgres.sql / app/models/order.py)
+ORDER_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_orders_date_id ON orders (order_date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_customer_date_id ON orders (customer_id, order_date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_store_date_id ON orders (store_id, order_date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_sales_date_id ON orders (sales_id, order_date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_orderitem_order ON orderitem (order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orderitem_order_date ON orderitem (order_date)",
+]
+
+# Copies the order's order_date onto new order items
+ORDERITEM_DATE_TRIGGER = """
+    CREATE OR REPLACE FUNCTION orderitem_set_order_date() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.order_date IS NULL THEN
+            SELECT order_date INTO NEW.order_date FROM orders WHERE id = NEW.order_id;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS orderitem_order_date ON orderitem;
+    CREATE TRIGGER orderitem_order_date BEFORE INSERT ON orderitem
+    FOR EACH ROW EXECUTE FUNCTION orderitem_set_order_date();
+"""
+
+
+def add_months(month, count):
+    """First day of the month count months after month"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"orders_{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(cur):
+    cur.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = 'orders'
+        )
+    """)
+    return cur.fetchone()[0]
+
+
+def table_exists(cur, name):
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    return cur.fetchone()[0]
+
+
+def create_partitions(cur, first_month, last_month):
+    """
+    Create monthly partitions covering [first_month, last_month]
+
+    Rows of a month that already landed in orders_default (e.g. after a
+    missed ensure run) are moved into the new partition; Postgres refuses to
+    create a partition whose range the default partition still holds.
+    """
+    has_default = table_exists(cur, 'orders_default')
+    month = first_month
+    created = []
+    while month <= last_month:
+        name = partition_name(month)
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+
+        stranded = False
+        if has_default and not table_exists(cur, name):
+            cur.execute(
+                "SELECT EXISTS (SELECT 1 FROM orders_default WHERE order_date >= %s AND order_date < %s)",
+                (start, end)
+            )
+            stranded = cur.fetchone()[0]
+
+        if stranded:
+            # Build the partition standalone, move the rows, then attach it.
+            # Order items reference the moving rows; check them at commit instead.
+            cur.execute("SET CONSTRAINTS ALL DEFERRED")
+            cur.execute(f"CREATE TABLE {name} (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cur.execute(f"""
+                WITH moved AS (
+                    DELETE FROM orders_default
+                    WHERE order_date >= %s AND order_date < %s
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+            """, (start, end))
+            print(f"🚚 {name}: moved {cur.rowcount} rows out of orders_default")
+            cur.execute(f"ALTER TABLE orders ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+        else:
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {name} PARTITION OF orders
+                FOR VALUES FROM ('{start}') TO ('{end}')
+            """)
+        created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def migrate(cur, months_ahead):
+    if is_partitioned(cur):
+        print("ℹ️  orders is already partitioned")
+        return
+
+    cur.execute("LOCK TABLE orders IN ACCESS EXCLUSIVE MODE")
+    cur.execute("SELECT MIN(order_date) FROM orders")
+    oldest = cur.fetchone()[0]
+    this_month = date.today().replace(day=1)
+    first_month = oldest.date().replace(day=1) if oldest else this_month
+
+    # Keep the id sequence: it is owned by the old table and would be dropped with it
+    cur.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    cur.execute("ALTER TABLE orders RENAME TO orders_legacy")
+
+    cur.execute("""
+        CREATE TABLE orders (
+            id              INT NOT NULL DEFAULT nextval('orders_id_seq'),
+            customer_id     INT NOT NULL REFERENCES Customer(id),
+            store_id        INT NOT NULL REFERENCES Store(id),
+            sales_id        INT NOT NULL REFERENCES SalesPerson(employee_id),
+            order_date      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            pickup_date     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            total_amount    BIGINT,
+            payment_status  BOOLEAN DEFAULT FALSE,
+            pickup_status   INT DEFAULT 0,
+            PRIMARY KEY (id, order_date)
+        ) PARTITION BY RANGE (order_date)
+    """)
+    cur.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+
+    created = create_partitions(cur, first_month, add_months(this_month, months_ahead))
+    # Catches rows outside the created ranges so inserts never fail
+    cur.execute("CREATE TABLE IF NOT EXISTS orders_default PARTITION OF orders DEFAULT")
+
+    columns = "id, customer_id, store_id, sales_id, order_date, pickup_date, total_amount, payment_status, pickup_status"
+    cur.execute(f"INSERT INTO orders ({columns}) SELECT {columns} FROM orders_legacy")
+    copied = cur.rowcount
+
+    # Key order items by (order_id, order_date) so they can reference the partitioned table
+    cur.execute("ALTER TABLE orderitem ADD COLUMN IF NOT EXISTS order_date TIMESTAMP")
+    cur.execute("""
+        UPDATE orderitem oi SET order_date = o.order_date
+        FROM orders_legacy o WHERE oi.order_id = o.id
+    """)
+
+    # Drops orderitem's foreign key to the old table as well
+    cur.execute("DROP TABLE orders_legacy CASCADE")
+    cur.execute("ALTER TABLE orderitem ALTER COLUMN order_date SET NOT NULL")
+    cur.execute(ORDERITEM_DATE_TRIGGER)
+    # Deferrable so rows can move between partitions within a transaction (see create_partitions)
+    cur.execute("""
+        ALTER TABLE orderitem ADD CONSTRAINT orderitem_order_fkey
+        FOREIGN KEY (order_id, order_date) REFERENCES orders (id, order_date)
+        DEFERRABLE INITIALLY IMMEDIATE
+    """)
+    for statement in ORDER_INDEXES:
+        cur.execute(statement)
+
+    print(f"✅ Partitioned orders: {copied} rows copied into {len(created)} monthly partitions")
+
+
+def ensure(cur, months_ahead):
+    if not is_partitioned(cur):
+        print("❌ orders is not partitioned; run migrate first")
+        sys.exit(1)
+    this_month = date.today().replace(day=1)
+    created = create_partitions(cur, this_month, add_months(this_month, months_ahead))
+    print(f"✅ Partitions present through {created[-1]}")
+
+
+def archive(cur, before, drop):
+    if not is_partitioned(cur):
+        print("❌ orders is not partitioned; run migrate first")
+        sys.exit(1)
+
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'orders' AND c.relname ~ '^orders_[0-9]{4}_[0-9]{2}$'
+        ORDER BY c.relname
+    """)
+    partitions = [row[0] for row in cur.fetchall()]
+    cur.execute("CREATE TABLE IF NOT EXISTS orderitem_archive (LIKE orderitem INCLUDING ALL)")
+
+    # Old rows stranded in the default partition get month partitions first, so they are archived too
+    if table_exists(cur, 'orders_default'):
+        cur.execute("""
+            SELECT DISTINCT date_trunc('month', order_date)::date
+            FROM orders_default WHERE order_date < %s ORDER BY 1
+        """, (before,))
+        for (month,) in cur.fetchall():
+            name = create_partitions(cur, month, month)[0]
+            if name not in partitions:
+                partitions.append(name)
+        partitions.sort()
+
+    for name in partitions:
+        year, month = int(name[7:11]), int(name[12:14])
+        if date(year, month, 1) >= before:
+            break
+
+        # Only archive months whose orders are all complete (2) or cancelled (3)
+        cur.execute(f"SELECT COUNT(*) FROM {name} WHERE pickup_status IS NULL OR pickup_status NOT IN (2, 3)")
+        open_orders = cur.fetchone()[0]
+        if open_orders:
+            print(f"⏭️  {name}: {open_orders} open orders, skipped")
+            continue
+
+        # Items first: the foreign key forbids detaching orders that are still referenced
+        cur.execute("""
+            WITH moved AS (
+                DELETE FROM orderitem
+                WHERE order_date >= %s AND order_date < %s
+                RETURNING *
+            )
+            INSERT INTO orderitem_archive SELECT * FROM moved
+        """, (date(year, month, 1), add_months(date(year, month, 1), 1)))
+        items = cur.rowcount
+        cur.execute(f"ALTER TABLE orders DETACH PARTITION {name}")
+
+        if drop:
+            cur.execute(f"DROP TABLE {name}")
+            print(f"🗑️  {name}: dropped ({items} order items kept in orderitem_archive)")
+        else:
+            cur.execute(f"ALTER TABLE {name} RENAME TO archive_{name}")
+            print(f"📦 {name}: detached as archive_{name} ({items} order items moved)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly partitioning for the orders table")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = sub.add_parser('migrate', help="Convert orders to a partitioned table")
+    migrate_parser.add_argument('--months-ahead', type=int, default=3)
+    migrate_parser.add_argument('--dry-run', action='store_true', help="Roll back instead of committing")
+
+    ensure_parser = sub.add_parser('ensure', help="Create upcoming monthly partitions")
+    ensure_parser.add_argument('--months-ahead', type=int, default=3)
+
+    archive_parser = sub.add_parser('archive', help="Detach old completed/cancelled partitions")
+    archive_parser.add_argument('--before', required=True, help="First month to keep, as YYYY-MM")
+    archive_parser.add_argument('--drop', action='store_true', help="Drop detached partitions instead of keeping them")
+    archive_parser.add_argument('--dry-run', action='store_true', help="Roll back instead of committing")
+
+    args = parser.parse_args()
+
+    # Check if DATABASE_URL is configured
+    if not os.getenv('DATABASE_URL'):
+        print("❌ Error: DATABASE_URL not found in .env file")
+        sys.exit(1)
+
+    conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+    cur = conn.cursor()
+    try:
+        if args.command == 'migrate':
+            migrate(cur, args.months_ahead)
+        elif args.command == 'ensure':
+            ensure(cur, args.months_ahead)
+        else:
+            try:
+                year, month = map(int, args.before.split('-'))
+                before = date(year, month, 1)
+            except ValueError:
+                print("❌ --before must be YYYY-MM")
+                sys.exit(1)
+            archive(cur, before, args.drop)
+
+        if getattr(args, 'dry_run', False):
+            conn.rollback()
+            print("ℹ️  Dry run: changes rolled back")
+        else:
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,8 @@ def main():
         try:
             cur.execute("""
                 DROP TABLE IF EXISTS 
+                    idempotencykey, 
+                    imagevariant, 
                     pickuprecord, 
                     orderitem, 
                     orders, 
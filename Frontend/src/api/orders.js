@@ -8,6 +8,14 @@ export function createOrder(data) {
   })
 }
 
+export function createOrdersBatch(data) {
+  return request({
+    url: '/orders/batch',
+    method: 'post',
+    data
+  })
+}
+
 export function getOrders(params) {
   return request({
     url: '/orders',
@@ -69,3 +77,19 @@ export function processPayment(id, paymentData) {
     data: paymentData
   })
 }
+
+export function processPaymentBatch(orderIds, paymentData) {
+  return request({
+    url: '/orders/batch/process-payment',
+    method: 'post',
+    data: { ...paymentData, order_ids: orderIds }
+  })
+}
+
+// Server-Sent Events of order changes visible to the current user
+export function subscribeOrderEvents(onEvent) {
+  const token = localStorage.getItem('token')
+  const source = new EventSource(`${request.defaults.baseURL}/orders/events?jwt=${encodeURIComponent(token)}`)
+  source.addEventListener('order', (e) => onEvent(JSON.parse(e.data)))
+  return source
+}
@@ -15,6 +15,14 @@ export function getProductCategories() {
   })
 }
 
+export function getProductsBatch(ids) {
+  return request({
+    url: '/products/batch',
+    method: 'get',
+    params: { ids: ids.join(',') }
+  })
+}
+
 export function getProductById(id) {
   return request({
     url: `/products/${id}`,
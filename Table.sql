@@ -12,9 +12,15 @@ CREATE TABLE IF NOT EXISTS Product (
     price             BIGINT NOT NULL,
     kind              VARCHAR(70),
     description       TEXT,
-    image_url         VARCHAR(255)
+    image_url         VARCHAR(255),
+    thumbnail_url     VARCHAR(255),
+    webp_url          VARCHAR(255)
 );
 
+-- Image variant columns for databases created before they existed
+ALTER TABLE Product ADD COLUMN IF NOT EXISTS thumbnail_url VARCHAR(255);
+ALTER TABLE Product ADD COLUMN IF NOT EXISTS webp_url VARCHAR(255);
+
 -- OnlineAccount table: 
 CREATE TABLE IF NOT EXISTS OnlineAccount (
     online_id SERIAL PRIMARY KEY,
@@ -133,3 +139,51 @@ CREATE TABLE IF NOT EXISTS OrderItem (
     FOREIGN KEY (order_id) REFERENCES Orders(id),
     FOREIGN KEY (product_id) REFERENCES Product(id)
 );
+
+-- Stored responses for Idempotency-Key retries (app/utils/idempotency.py)
+CREATE TABLE IF NOT EXISTS IdempotencyKey (
+    online_id       INT NOT NULL,
+    idem_key        VARCHAR(255) NOT NULL,
+    endpoint        VARCHAR(255) NOT NULL,
+    request_hash    VARCHAR(64) NOT NULL,
+    status_code     INT,                     -- NULL while the first request is running
+    response_body   TEXT,
+    created_at      TIMESTAMP NOT NULL,
+    PRIMARY KEY (online_id, idem_key, endpoint)
+);
+CREATE INDEX IF NOT EXISTS idx_idempotencykey_created ON IdempotencyKey (created_at);
+
+-- Thumbnail/WebP variants of uploaded images, keyed by the original's URL
+CREATE TABLE IF NOT EXISTS ImageVariant (
+    original_url    VARCHAR(255) PRIMARY KEY,
+    thumbnail_url   VARCHAR(255) NOT NULL,
+    webp_url        VARCHAR(255) NOT NULL,
+    created_at      TIMESTAMP NOT NULL
+);
+
+-- Indexes for keyset-paginated catalog reads
+CREATE INDEX IF NOT EXISTS idx_product_name_id ON Product (product_name, id);
+CREATE INDEX IF NOT EXISTS idx_product_kind ON Product (kind);
+CREATE INDEX IF NOT EXISTS idx_product_price ON Product (price);
+CREATE INDEX IF NOT EXISTS idx_storeinventory_product ON StoreInventory (product_id);
+
+-- Indexes for keyset-paginated order lists (GET /api/orders), globally and per role scope
+CREATE INDEX IF NOT EXISTS idx_orders_date_id ON Orders (order_date, id);
+CREATE INDEX IF NOT EXISTS idx_orders_customer_date_id ON Orders (customer_id, order_date, id);
+CREATE INDEX IF NOT EXISTS idx_orders_store_date_id ON Orders (store_id, order_date, id);
+CREATE INDEX IF NOT EXISTS idx_orders_sales_date_id ON Orders (sales_id, order_date, id);
+
+-- Trigram indexes for substring order search (app/utils/order_search.py)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_onlineaccount_name_trgm ON OnlineAccount USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_onlineaccount_email_trgm ON OnlineAccount USING GIN (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_product_name_trgm ON Product USING GIN (product_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_orderitem_product_order ON OrderItem (product_id, order_id);
+CREATE INDEX IF NOT EXISTS idx_customer_online ON Customer (online_id);
+
+-- Full-text search index for /api/products/search (expression must match app/utils/product_search.py)
+CREATE INDEX IF NOT EXISTS idx_product_search ON Product USING GIN ((
+    setweight(to_tsvector('english', coalesce(product_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(kind, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+));